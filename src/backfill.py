@@ -0,0 +1,168 @@
+import os
+import sys
+import time
+import argparse
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+from slack_api import iter_pages, SlackApiError
+from message_store import get_message_store
+from channel_index import get_channel_index
+from channel_fetcher import MAX_WORKERS
+from membership import preflight
+from local_cache import cache_path, load_json, save_json
+
+# Load .env from project root
+env_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.env'))
+load_dotenv(env_path)
+
+SLACK_BOT_TOKEN = os.getenv("SLACK_BOT_TOKEN")
+BACKFILL_STATE_FILE = cache_path('backfill_state.json')
+DEFAULT_DAYS = 365
+# History is walked oldest to newest in windows of this many days; each window is paged newest first
+DEFAULT_WINDOW_DAYS = 7
+
+
+class BackfillState:
+    """Per-channel backfill checkpoints (current window start + page cursor), saved after every page"""
+
+    def __init__(self, path=BACKFILL_STATE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self.channels = load_json(self.path, {})
+
+    def get(self, channel_id):
+        with self._lock:
+            return dict(self.channels.get(channel_id) or {})
+
+    def reset(self, channel_id):
+        with self._lock:
+            self.channels.pop(channel_id, None)
+            self._save()
+
+    def checkpoint(self, channel_id, **fields):
+        with self._lock:
+            self.channels.setdefault(channel_id, {}).update(fields)
+            self._save()
+
+    def _save(self):
+        save_json(self.path, self.channels, indent=2)
+
+
+def backfill_replies(token, channel_id, messages, store):
+    """Store every reply of the thread parents in `messages`; returns how many were stored"""
+    count = 0
+    for msg in messages:
+        if not msg.get("reply_count") or msg.get("thread_ts", msg["ts"]) != msg["ts"]:
+            continue
+        params = {"channel": channel_id, "ts": msg["ts"]}
+        for replies, _ in iter_pages(token, "conversations.replies", "messages", params):
+            store.add_messages(channel_id, replies)
+            count += len(replies)
+    return count
+
+
+def backfill_channel(token, channel_id, since, until, state, window=DEFAULT_WINDOW_DAYS * 86400,
+                     replies=False, store=None):
+    """Stream one channel's history from `since` to `until` (epoch seconds) into the message store.
+
+    Only one page is held in memory at a time. The checkpoint is advanced after every stored
+    page, so a crash or a run of 429s resumes from the last page rather than from `since`.
+    Returns True once the channel is caught up to `until`.
+    """
+    store = store or get_message_store()
+    checkpoint = state.get(channel_id)
+    window_start = checkpoint.get("window_start", since)
+    cursor = checkpoint.get("cursor")
+    messages_seen = checkpoint.get("messages", 0)
+    replies_seen = checkpoint.get("replies", 0)
+    if checkpoint:
+        print(f"↻ Resuming {channel_id} from {datetime.fromtimestamp(window_start):%Y-%m-%d}"
+              f"{' mid-window' if cursor else ''} ({messages_seen} messages so far)")
+    try:
+        while window_start < until:
+            window_end = min(window_start + window, until)
+            # inclusive: a message exactly on a window boundary is fetched twice rather than never
+            params = {"channel": channel_id, "oldest": f"{window_start:.6f}", "latest": f"{window_end:.6f}",
+                      "inclusive": "true"}
+            for messages, next_cursor in iter_pages(token, "conversations.history", "messages", params, cursor=cursor):
+                store.add_messages(channel_id, messages)
+                messages_seen += len(messages)
+                if replies:
+                    replies_seen += backfill_replies(token, channel_id, messages, store)
+                if next_cursor is None:
+                    window_start, cursor = window_end, None
+                else:
+                    cursor = next_cursor
+                state.checkpoint(channel_id, window_start=window_start, cursor=cursor,
+                                 messages=messages_seen, replies=replies_seen)
+    except SlackApiError as e:
+        print(f"❌ Backfill of {channel_id} stopped at {datetime.fromtimestamp(window_start):%Y-%m-%d}: "
+              f"{e.data.get('error')}. Re-run to resume from the last checkpoint.")
+        return False
+    state.checkpoint(channel_id, window_start=until, cursor=None, completed_at=until)
+    print(f"✅ Backfilled {channel_id}: {messages_seen} messages, {replies_seen} thread replies")
+    return True
+
+
+def backfill_channels(token, channel_ids, since, until=None, window_days=DEFAULT_WINDOW_DAYS, replies=False,
+                      max_workers=MAX_WORKERS, restart=False, state=None):
+    """Backfill many channels concurrently; returns {channel_id: caught up (bool)}.
+
+    Channels with a checkpoint resume from it. Re-running after a completed backfill only
+    fetches what was posted since. All requests share slack_api's per-method rate limiter.
+    """
+    state = state or BackfillState()
+    until = until or time.time()
+    if restart:
+        for channel_id in channel_ids:
+            state.reset(channel_id)
+    if not channel_ids:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(channel_ids))) as pool:
+        futures = {
+            channel_id: pool.submit(backfill_channel, token, channel_id, since, until, state,
+                                    window_days * 86400, replies)
+            for channel_id in channel_ids
+        }
+        return {channel_id: future.result() for channel_id, future in futures.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill Slack channel history into the local message store")
+    parser.add_argument("channels", nargs="*", metavar="CHANNEL_ID",
+                        help="Channel IDs to backfill (default: every channel the bot is a member of)")
+    parser.add_argument("--since", help="Start date (YYYY-MM-DD); default is --days ago")
+    parser.add_argument("--days", type=int, default=DEFAULT_DAYS, help="How far back to go when --since is not given")
+    parser.add_argument("--window-days", type=int, default=DEFAULT_WINDOW_DAYS,
+                        help="Size of each oldest-to-newest history window")
+    parser.add_argument("--replies", action="store_true", help="Also backfill thread replies")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="Number of channels backfilled concurrently")
+    parser.add_argument("--restart", action="store_true", help="Ignore saved checkpoints and start over")
+    parser.add_argument("--join", action="store_true", help="Join public channels the bot is not a member of")
+    args = parser.parse_args()
+
+    if not SLACK_BOT_TOKEN:
+        print("Error: SLACK_BOT_TOKEN not set in environment. Please add it to your .env file.")
+        return 1
+    since = (datetime.strptime(args.since, "%Y-%m-%d").timestamp() if args.since
+             else time.time() - args.days * 86400)
+    channel_ids = args.channels or [
+        entry["id"] for _, entry in get_channel_index(SLACK_BOT_TOKEN).active_channels() if entry["is_member"]
+    ]
+    channel_ids, _ = preflight(SLACK_BOT_TOKEN, channel_ids, auto_join=args.join)
+    print(f"Backfilling {len(channel_ids)} channels since {datetime.fromtimestamp(since):%Y-%m-%d}")
+    results = backfill_channels(SLACK_BOT_TOKEN, channel_ids, since, window_days=args.window_days,
+                                replies=args.replies, max_workers=args.workers, restart=args.restart)
+    failed = [channel_id for channel_id, ok in results.items() if not ok]
+    if failed:
+        print(f"⚠️ {len(failed)} channels did not finish: {', '.join(failed)}")
+        return 1
+    print(f"✅ {len(results)} channels backfilled into {get_message_store().path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+import re
+import sys
+import time
+import argparse
+
+from fake_services import make_workspace
+from mrkdwn import MrkdwnRenderer, EMOJI
+
+
+def legacy_render(messages, user_map):
+    """The pipelines' original approach: a fresh closure per message, user mentions only"""
+    mention_pattern = re.compile(r"<@([A-Z0-9]+)>")
+    out = []
+    for msg in messages:
+        text = msg.get("text", "")
+        def replace_mention(match):
+            uid = match.group(1)
+            return user_map.get(uid, f"@{uid}")
+        out.append(mention_pattern.sub(replace_mention, text))
+    return out
+
+
+def legacy_render_all_markup(messages, user_map, channels):
+    """The original approach extended to the markup mrkdwn handles: one closure and pass per kind"""
+    mention_pattern = re.compile(r"<@([A-Z0-9]+)(?:\|[^>]*)?>")
+    channel_pattern = re.compile(r"<#([A-Z0-9]+)(?:\|([^>]*))?>")
+    link_pattern = re.compile(r"<([^@#!|>][^|>]*)(?:\|([^>]*))?>")
+    emoji_pattern = re.compile(r":([a-z0-9_+'-]+):")
+    out = []
+    for msg in messages:
+        text = msg.get("text", "")
+        def replace_mention(match):
+            return user_map.get(match.group(1), f"@{match.group(1)}")
+        def replace_channel(match):
+            return f"#{match.group(2) or channels.get(match.group(1), match.group(1))}"
+        def replace_link(match):
+            return f"{match.group(2)} ({match.group(1)})" if match.group(2) else match.group(1)
+        def replace_emoji(match):
+            return EMOJI.get(match.group(1), match.group(0))
+        text = mention_pattern.sub(replace_mention, text)
+        text = channel_pattern.sub(replace_channel, text)
+        text = link_pattern.sub(replace_link, text)
+        text = emoji_pattern.sub(replace_emoji, text)
+        out.append(text.replace("&lt;", "<").replace("&gt;", ">").replace("&amp;", "&"))
+    return out
+
+
+def engine_render(messages, user_map, channels):
+    renderer = MrkdwnRenderer(users=user_map, channels=channels)
+    return renderer.render_many([msg.get("text", "") for msg in messages])
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare message text rendering on synthetic histories")
+    parser.add_argument("--messages", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="Total messages to render")
+    parser.add_argument("--repeat", type=int, default=3, help="Best of this many runs")
+    args = parser.parse_args()
+
+    for total in args.messages:
+        workspace = make_workspace(max(1, total // 1000), messages_per_channel=min(total, 1000), num_users=500)
+        messages = [msg for history in workspace["history"].values() for msg in history]
+        user_map = {u["id"]: u["profile"]["display_name"] for u in workspace["users"]}
+        channels = {ch["id"]: ch["name"] for ch in workspace["channels"]}
+        legacy = timed(lambda: legacy_render(messages, user_map), args.repeat)
+        legacy_all = timed(lambda: legacy_render_all_markup(messages, user_map, channels), args.repeat)
+        engine = timed(lambda: engine_render(messages, user_map, channels), args.repeat)
+        print(f"{len(messages):>8} messages  closures, users only {legacy * 1000:>8.1f}ms  "
+              f"closures, all markup {legacy_all * 1000:>8.1f}ms  "
+              f"mrkdwn {engine * 1000:>8.1f}ms ({legacy_all / engine:.2f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
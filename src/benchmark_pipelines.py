@@ -0,0 +1,173 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+from contextlib import redirect_stdout
+
+from fake_services import FakeSheetsService, FakeSlackServer, FakeEventSource, make_workspace
+
+# Everything below reads its configuration at import time, so the fake endpoints and a
+# throwaway cache directory have to be in the environment before the pipelines are imported.
+CACHE_DIR = tempfile.mkdtemp(prefix="slack-bench-")
+RATE_LIMIT_SCALE = float(os.getenv("SLACK_RATE_LIMIT_SCALE", 100))
+os.environ.update({
+    "SLACK_BOT_TOKEN": "xoxb-benchmark",
+    "GOOGLE_SHEET_ID": "benchmark-sheet",
+    "SLACK_SUMMARY_CACHE_DIR": CACHE_DIR,
+    "SLACK_MESSAGE_DB": os.path.join(CACHE_DIR, "messages.db"),
+    "SLACK_RATE_LIMIT_SCALE": str(RATE_LIMIT_SCALE),
+    "SLACK_SIGNING_SECRET": "benchmark-signing-secret",
+})
+SLACK_SERVER = FakeSlackServer(rate_limit_scale=RATE_LIMIT_SCALE).start()
+os.environ["SLACK_API_URL"] = SLACK_SERVER.url
+
+import channel_index  # noqa: E402
+import user_directory  # noqa: E402
+import membership  # noqa: E402
+import sheet_anchors  # noqa: E402
+import message_store  # noqa: E402
+import google_sheets_real  # noqa: E402
+import push_general_to_project_summary  # noqa: E402
+import slack_to_project_summary  # noqa: E402
+import slack_to_sheet_meeting_cadence  # noqa: E402
+import event_ingest  # noqa: E402
+from instrumentation import metrics  # noqa: E402
+
+
+def make_sheet(latency):
+    """Fake spreadsheet laid out like the real one: a 'Meeting Cadence' header on row 26"""
+    project_summary = [[""] for _ in range(25)] + [["Meeting Cadence", "Message", "Execution Timestamp"]]
+    return FakeSheetsService({"project summary": project_summary, "Sheet1": []}, latency=latency)
+
+
+def reset_caches():
+    """Cold start: drop on-disk caches and the per-process singletons built from them"""
+    if message_store._store is not None:
+        message_store._store.close()
+        message_store._store = None
+    shutil.rmtree(CACHE_DIR, ignore_errors=True)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    user_directory._directories.clear()
+    channel_index._indexes.clear()
+    membership._memberships.clear()
+    sheet_anchors._resolvers.clear()
+
+
+def use_sheet(sheet):
+    google_sheets_real.set_sheets_client(google_sheets_real.GoogleSheetsClient(service=sheet))
+
+
+def run_pipeline(name, fn, sheet):
+    sheet.calls.clear()
+    SLACK_SERVER.load(SLACK_SERVER.workspace)  # reset counters, keep workspace state
+    metrics.reset()
+    tracemalloc.start()
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        fn()
+    wall = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "pipeline": name,
+        "wall_seconds": round(wall, 3),
+        "peak_memory_mb": round(peak / 1e6, 2),
+        "slack_calls": sum(SLACK_SERVER.calls.values()),
+        "slack_calls_by_method": dict(SLACK_SERVER.calls),
+        "slack_429s": sum(SLACK_SERVER.rate_limited.values()),
+        "slack_bytes": SLACK_SERVER.bytes_sent,
+        "sheets_calls": sum(sheet.calls.values()),
+        "sheets_calls_by_method": dict(sheet.calls),
+        # Client-side view of the same run, as the instrumentation layer reports it in production
+        "client_report": metrics.report(),
+    }
+
+
+def pipelines(channels):
+    channel_pairs = [(ch["id"], ch["name"]) for ch in channels if ch["is_member"]]
+    target = channel_pairs[0][1]
+
+    def push_all():
+        push_general_to_project_summary.push_channels_summary_to_sheet(channel_pairs)
+
+    def push_each():
+        for channel_id, channel_name in channel_pairs:
+            push_general_to_project_summary.push_channel_summary_to_sheet(channel_id, channel_name)
+
+    def project_summary():
+        slack_to_project_summary.CHANNEL_NAME = target
+        slack_to_project_summary.main()
+
+    def meeting_cadence():
+        slack_to_sheet_meeting_cadence.CHANNEL_NAME = target
+        slack_to_sheet_meeting_cadence.main()
+
+    def ingest_events():
+        # One message event per channel pushed through the Events API receiver, drained on stop()
+        batcher = event_ingest.MessageBatcher(event_ingest.make_sheet_sink(), batch_size=100).start()
+        receiver = event_ingest.EventReceiver(batcher, host="127.0.0.1", port=0).start()
+        source = FakeEventSource(f"http://127.0.0.1:{receiver.port}/slack/events",
+                                 os.environ["SLACK_SIGNING_SECRET"])
+        for channel_id, _ in channel_pairs:
+            source.message(channel_id, "benchmark event <@U00000001>")
+        receiver.stop()
+        batcher.stop()
+
+    return [
+        ("push_channels_summary_to_sheet", push_all),
+        ("push_channel_summary_to_sheet (per channel)", push_each),
+        ("slack_to_project_summary.main", project_summary),
+        ("slack_to_sheet_meeting_cadence.main", meeting_cadence),
+        ("event_ingest (1 event per channel)", ingest_events),
+    ]
+
+
+def benchmark(sizes, messages_per_channel, users, slack_latency, sheets_latency):
+    results = []
+    for size in sizes:
+        workspace = make_workspace(size, messages_per_channel=messages_per_channel, num_users=users)
+        for name, fn in pipelines(workspace["channels"]):
+            SLACK_SERVER.load(workspace)
+            sheet = make_sheet(sheets_latency)
+            use_sheet(sheet)
+            reset_caches()
+            for phase in ("cold", "warm"):
+                result = run_pipeline(name, fn, sheet)
+                result.update(channels=size, phase=phase)
+                results.append(result)
+                print(f"{size:>6} {name:<45} {phase:<5} {result['wall_seconds']:>8.3f}s "
+                      f"{result['peak_memory_mb']:>8.2f}MB slack={result['slack_calls']:<6} "
+                      f"429s={result['slack_429s']:<4} sheets={result['sheets_calls']}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Slack -> Sheets pipelines against local fakes")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000], help="Workspace sizes (channels)")
+    parser.add_argument("--messages", type=int, default=20, help="Messages per channel")
+    parser.add_argument("--users", type=int, default=200, help="Workspace members")
+    parser.add_argument("--slack-latency-ms", type=float, default=20, help="Latency added to every Slack call")
+    parser.add_argument("--sheets-latency-ms", type=float, default=50, help="Latency added to every Sheets call")
+    parser.add_argument("--json", help="Also write the full results to this file")
+    args = parser.parse_args()
+
+    print(f"Fake Slack at {SLACK_SERVER.url}, rate limits x{RATE_LIMIT_SCALE:g}, caches in {CACHE_DIR}")
+    try:
+        results = benchmark(args.sizes, args.messages, args.users,
+                            args.slack_latency_ms / 1000, args.sheets_latency_ms / 1000)
+    finally:
+        SLACK_SERVER.stop()
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Results written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
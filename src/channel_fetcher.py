@@ -0,0 +1,82 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from slack_api import api_get, paginate, SlackApiError
+from message_store import get_message_store
+from membership import get_membership, NOT_READABLE_ERRORS
+
+MAX_WORKERS = 8
+
+
+def fetch_history(token, channel_id, limit=5, oldest=None):
+    """Fetch one channel's history, newest first.
+
+    Without `oldest` this is the latest `limit` messages; with `oldest` it pages through
+    every message newer than that ts. Everything fetched is recorded in the local message
+    store. Returns None if Slack reports an error.
+    """
+    if oldest:
+        try:
+            messages = list(paginate(token, "conversations.history", "messages",
+                                     {"channel": channel_id, "oldest": oldest}))
+        except SlackApiError as e:
+            print(f"Error fetching messages for {channel_id}: {e.data}")
+            _forget_if_unreadable(token, channel_id, e.data)
+            return None
+    else:
+        data = api_get(token, "conversations.history", {"channel": channel_id, "limit": limit})
+        if not data.get("ok"):
+            print(f"Error fetching messages for {channel_id}: {data}")
+            _forget_if_unreadable(token, channel_id, data)
+            return None
+        messages = data.get("messages", [])
+    get_message_store().add_messages(channel_id, messages)
+    return messages
+
+
+def _forget_if_unreadable(token, channel_id, data):
+    # Keeps the membership cache honest when the bot is removed between sweeps
+    if data.get("error") in NOT_READABLE_ERRORS:
+        get_membership(token).discard(channel_id)
+
+
+def _fetch_and_prepare(token, channel_id, limit, oldest, prepare):
+    messages = fetch_history(token, channel_id, limit, oldest)
+    if messages and prepare:
+        return messages, prepare(channel_id, messages)
+    return messages, None
+
+
+def iter_channels_history(token, channel_ids, limit=5, oldest=None, max_workers=MAX_WORKERS, prepare=None):
+    """Fetch history for many channels concurrently, yielding (channel_id, messages or None)
+    as each channel finishes so callers can process early channels while the rest download.
+
+    With `prepare`, prepare(channel_id, messages) also runs on the fetch worker for every
+    channel with messages, and (channel_id, messages, result) is yielded instead.
+
+    `oldest` optionally maps channel_id -> high-water ts. Requests share the per-method
+    rate limiter in slack_api, so fan-out never exceeds Slack's tier budget. Channels the
+    bot is not a member of (per the cached membership sweep) are not requested at all.
+    """
+    oldest = oldest or {}
+    if not channel_ids:
+        return
+    readable = get_membership(token).readable(channel_ids)
+    for channel_id in channel_ids:
+        if channel_id not in readable:
+            yield (channel_id, None, None) if prepare else (channel_id, None)
+    if not readable:
+        return
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(readable))) as pool:
+        futures = {
+            pool.submit(_fetch_and_prepare, token, channel_id, limit, oldest.get(channel_id), prepare): channel_id
+            for channel_id in readable
+        }
+        for future in as_completed(futures):
+            messages, result = future.result()
+            yield (futures[future], messages, result) if prepare else (futures[future], messages)
+
+
+def fetch_channels_history(token, channel_ids, limit=5, oldest=None, max_workers=MAX_WORKERS):
+    """Fetch history for many channels concurrently; returns {channel_id: messages or None}"""
+    results = dict.fromkeys(channel_ids)
+    results.update(iter_channels_history(token, channel_ids, limit, oldest, max_workers))
+    return results
@@ -0,0 +1,105 @@
+import time
+from slack_api import paginate, SlackApiError
+from local_cache import cache_path, load_json, save_json, Shared
+
+CHANNEL_CACHE_FILE = cache_path('channels.json')
+CHANNEL_CACHE_TTL = 24 * 60 * 60  # seconds before conversations.list is swept again
+
+_indexes = Shared()
+
+
+class ChannelIndex:
+    """Channel name -> ID/membership/archived index, cached on disk and refreshed lazily"""
+
+    def __init__(self, token, cache_file=CHANNEL_CACHE_FILE, ttl=CHANNEL_CACHE_TTL):
+        self.token = token
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.fetched_at = 0
+        # name -> {"id": ..., "is_member": bool, "is_archived": bool}
+        self.channels = {}
+        self._refreshed = False  # at most one miss-triggered sweep per process
+        self._load()
+
+    def _load(self):
+        cached = load_json(self.cache_file, {})
+        self.fetched_at = cached.get("fetched_at", 0)
+        self.channels = cached.get("channels", {})
+
+    def _save(self):
+        save_json(self.cache_file, {"fetched_at": self.fetched_at, "channels": self.channels})
+
+    def is_stale(self):
+        return time.time() - self.fetched_at > self.ttl
+
+    def refresh(self):
+        """Rebuild the index from a full conversations.list sweep (archived channels included)"""
+        channels = {}
+        params = {"exclude_archived": False, "types": "public_channel,private_channel"}
+        try:
+            for ch in paginate(self.token, "conversations.list", "channels", params):
+                channels[ch["name"]] = {
+                    "id": ch["id"],
+                    "is_member": ch.get("is_member", False),
+                    "is_archived": ch.get("is_archived", False),
+                    "is_private": ch.get("is_private", False),
+                }
+        except SlackApiError as e:
+            print(f"Error listing channels: {e.data}")
+            return False
+        self.channels = channels
+        self.fetched_at = time.time()
+        self._refreshed = True
+        self._save()
+        print(f"🔄 Channel index refreshed: {len(self.channels)} channels")
+        return True
+
+    def get(self, channel_name):
+        """Index entry for `channel_name`, sweeping Slack only if the cache is stale or misses"""
+        if self.is_stale():
+            self.refresh()
+        entry = self.channels.get(channel_name)
+        if entry is None and not self._refreshed:
+            # New or renamed channel since the last sweep
+            self.refresh()
+            entry = self.channels.get(channel_name)
+        return entry
+
+    def find_id(self, channel_name):
+        """ID of a live (non-archived) channel, or None"""
+        entry = self.get(channel_name)
+        if entry is None or entry["is_archived"]:
+            return None
+        return entry["id"]
+
+    def active_channels(self):
+        """(name, entry) pairs for every non-archived channel in the index"""
+        if self.is_stale():
+            self.refresh()
+        return [(name, entry) for name, entry in self.channels.items() if not entry["is_archived"]]
+
+    def public_ids(self, channel_ids=()):
+        """IDs of the live public channels, the ones the bot can join without an invite.
+
+        Private channels the bot is not in are not listed by Slack at all. One re-sweep is
+        made if any of `channel_ids` is unknown, in case it was created since the last sweep.
+        """
+        known = {entry["id"] for entry in self.channels.values()}
+        if self.is_stale() or (not self._refreshed and not known.issuperset(channel_ids)):
+            self.refresh()
+        return {
+            entry["id"] for entry in self.channels.values()
+            # Entries cached before is_private was kept: legacy private channel IDs start with G
+            if not entry["is_archived"] and not entry.get("is_private", entry["id"].startswith("G"))
+        }
+
+    def names_by_id(self):
+        """Channel ID -> name for every indexed channel, for rendering <#C…> references"""
+        if self.is_stale():
+            self.refresh()
+        return {entry["id"]: name for name, entry in self.channels.items()}
+
+
+def get_channel_index(token):
+    """The process-wide ChannelIndex for `token`"""
+    return _indexes.get(token, lambda: ChannelIndex(token))
@@ -1,27 +1,55 @@
 import os
+import sys
+import argparse
 from dotenv import load_dotenv
-import requests
+from membership import get_membership, preflight
 
 # Load .env from project root
 env_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.env'))
 load_dotenv(env_path)
 
 SLACK_BOT_TOKEN = os.getenv("SLACK_BOT_TOKEN")
-CHANNEL_ID = "C07QR3DV82K"  # integration_testing
 
 def check_bot_membership(channel_id):
-    url = "https://slack.com/api/conversations.info"
-    headers = {"Authorization": f"Bearer {SLACK_BOT_TOKEN}"}
-    params = {"channel": channel_id}
-    resp = requests.get(url, headers=headers, params=params)
-    data = resp.json()
-    if not data.get("ok"):
-        print(f"Error fetching channel info: {data}")
-        return False
-    channel = data.get("channel", {})
-    is_member = channel.get("is_member", False)
-    print(f"Bot is{' ' if is_member else ' NOT '}a member of channel {channel_id} ({channel.get('name', 'unknown')})")
+    """Whether the bot is a member of `channel_id`, from the cached users.conversations sweep"""
+    is_member = get_membership(SLACK_BOT_TOKEN).is_member(channel_id)
+    print(f"Bot is{' ' if is_member else ' NOT '}a member of channel {channel_id}")
     return is_member
 
+def configured_channels():
+    """Every channel entry in the jobs config, if there is one"""
+    from clean_daily_automation import load_config, DEFAULT_CONFIG_FILE
+    if not os.path.exists(DEFAULT_CONFIG_FILE):
+        return []
+    entries = []
+    for job in load_config(DEFAULT_CONFIG_FILE).get("jobs", []):
+        entries.extend(job.get("channels") or ([job["channel"]] if job.get("channel") else []))
+    return entries
+
+def main():
+    parser = argparse.ArgumentParser(description="Check (and optionally fix) bot membership for many channels at once")
+    parser.add_argument("channels", nargs="*",
+                        help="Channel IDs, ID:name pairs or names (default: every channel in the jobs config)")
+    parser.add_argument("--join", action="store_true", help="Join the public channels the bot is not a member of")
+    args = parser.parse_args()
+
+    if not SLACK_BOT_TOKEN:
+        print("Error: SLACK_BOT_TOKEN not set in environment. Please add it to your .env file.")
+        return 1
+    from clean_daily_automation import resolve_channels
+    channels = resolve_channels(args.channels or configured_channels())
+    if not channels:
+        membership = get_membership(SLACK_BOT_TOKEN)
+        if membership.is_stale():
+            membership.refresh()
+        print(f"No channels given or configured; the bot is a member of {len(membership.member_ids)} channels.")
+        return 0
+    readable, unreadable = preflight(SLACK_BOT_TOKEN, [channel_id for channel_id, _ in channels], auto_join=args.join)
+    names = dict(channels)
+    for channel_id, _ in channels:
+        print(f"{'✅' if channel_id in readable else '❌'} {channel_id} ({names[channel_id]})")
+    print(f"\nBot can read {len(readable)}/{len(channels)} channels")
+    return 1 if unreadable else 0
+
 if __name__ == "__main__":
-    check_bot_membership(CHANNEL_ID)
+    sys.exit(main())
@@ -0,0 +1,207 @@
+import os
+import re
+import sys
+import time
+import argparse
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    import tomli as tomllib
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+from instrumentation import metrics, write_reports, RUN_REPORT_FILE, PROMETHEUS_TEXTFILE
+
+# Load .env from project root
+env_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.env'))
+load_dotenv(env_path)
+
+SLACK_BOT_TOKEN = os.getenv("SLACK_BOT_TOKEN")
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_CONFIG_FILE = os.getenv("DAILY_JOBS_FILE") or os.path.join(PROJECT_ROOT, 'daily_jobs.toml')
+# Slack channel IDs are uppercase (C…/G…); channel names are always lowercase
+CHANNEL_ID_PATTERN = re.compile(r"^[CG][A-Z0-9]{6,}$")
+
+
+def load_config(path):
+    """Read the jobs config: TOML, or YAML when PyYAML is installed"""
+    if path.endswith((".yaml", ".yml")):
+        try:
+            import yaml
+        except ImportError:
+            raise RuntimeError(f"{path} is YAML but PyYAML is not installed; pip install pyyaml or use TOML")
+        with open(path) as f:
+            config = yaml.safe_load(f) or {}
+    else:
+        with open(path, "rb") as f:
+            config = tomllib.load(f)
+    jobs = config.get("jobs", [])
+    for i, job in enumerate(jobs):
+        if job.get("type") not in JOB_TYPES:
+            raise RuntimeError(f"Job {i + 1} ({job.get('name', 'unnamed')}): unknown type {job.get('type')!r}; "
+                               f"expected one of {', '.join(JOB_TYPES)}")
+    return config
+
+
+def resolve_channels(entries):
+    """Config channel entries -> [(channel_id, channel_name)]: "C0123", "C0123:name" or a channel name"""
+    from channel_index import get_channel_index
+    channels = []
+    for entry in entries:
+        if ":" in entry:
+            channels.append(tuple(entry.split(":", 1)))
+        elif CHANNEL_ID_PATTERN.match(entry):
+            channels.append((entry, "(unknown)"))
+        else:
+            channel_id = get_channel_index(SLACK_BOT_TOKEN).find_id(entry)
+            if channel_id:
+                channels.append((channel_id, entry))
+            else:
+                print(f"⚠️ Channel '{entry}' not found, skipping.")
+    return channels
+
+
+def run_project_summary(job):
+    import push_general_to_project_summary as project_summary
+    channels = resolve_channels(job["channels"])
+    return project_summary.push_channels_summary_to_sheet(
+        channels, incremental=job.get("incremental", False),
+        max_workers=job.get("workers", project_summary.MAX_WORKERS),
+        tab_name=job.get("tab", project_summary.TAB_NAME))
+
+
+def run_meeting_cadence(job):
+    import slack_to_sheet_meeting_cadence as meeting_cadence
+    return meeting_cadence.write_meeting_cadence(
+        job["channel"], job.get("messages", meeting_cadence.NUM_MESSAGES),
+        job.get("tab", meeting_cadence.TAB_NAME), job.get("header_row"))
+
+
+def run_under_header(job):
+    import slack_to_project_summary
+    return slack_to_project_summary.write_under_header(
+        job["channel"], job.get("messages", slack_to_project_summary.NUM_MESSAGES),
+        job.get("tab", slack_to_project_summary.TAB_NAME))
+
+
+def run_daily_summary(job):
+    import summarizer
+    day = job.get("date") or (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
+    channel_ids = [channel_id for channel_id, _ in resolve_channels(job["channels"])] if job.get("channels") else None
+    from user_directory import get_user_directory
+    from channel_index import get_channel_index
+    user_map = get_user_directory(SLACK_BOT_TOKEN).user_map()
+    channel_names = get_channel_index(SLACK_BOT_TOKEN).names_by_id()
+    summaries = summarizer.summarize(day, channel_ids, user_map, channel_names,
+                                     job.get("top", summarizer.TOP_MESSAGES), job.get("workers", 1))
+    return summarizer.write_summaries(day, summaries, channel_names, tab_name=job.get("tab", summarizer.TAB_NAME))
+
+
+def run_rollups(job):
+    import rollups
+    from user_directory import get_user_directory
+    from channel_index import get_channel_index
+    index = get_channel_index(SLACK_BOT_TOKEN)
+    total_channels = len([entry for _, entry in index.active_channels() if entry["is_member"]]) or None
+    return rollups.write_rollups(job.get("days", rollups.DEFAULT_DAYS), index.names_by_id(),
+                                 get_user_directory(SLACK_BOT_TOKEN).user_map(), total_channels,
+                                 tab_name=job.get("tab", rollups.TAB_NAME))
+
+
+def run_rollover(job):
+    import tab_rollover
+    return tab_rollover.rollover(job.get("tab", tab_rollover.project_summary.TAB_NAME),
+                                 job.get("days", tab_rollover.ROLLOVER_DAYS)) is not None
+
+
+def preflight_jobs(jobs, auto_join=False):
+    """Check bot membership for every channel any job reads, with one users.conversations sweep.
+
+    With auto_join, public channels the bot is missing from are joined before the jobs run.
+    """
+    from membership import preflight
+    channel_ids = []
+    for job in jobs:
+        entries = job.get("channels") or ([job["channel"]] if job.get("channel") else [])
+        for channel_id, _ in resolve_channels(entries):
+            if channel_id not in channel_ids:
+                channel_ids.append(channel_id)
+    if not channel_ids:
+        return [], []
+    readable, unreadable = preflight(SLACK_BOT_TOKEN, channel_ids, auto_join=auto_join)
+    print(f"🔎 Preflight: bot can read {len(readable)}/{len(channel_ids)} configured channels")
+    return readable, unreadable
+
+
+JOB_TYPES = {
+    "project_summary": run_project_summary,    # keyed upsert of recent messages (push_general_to_project_summary)
+    "meeting_cadence": run_meeting_cadence,    # last N messages (with replies) below the header anchor
+    "under_header": run_under_header,          # last N messages below the 'Meeting Cadence' header
+    "daily_summary": run_daily_summary,        # offline extractive summary per channel (summarizer)
+    "rollups": run_rollups,                    # per-channel/user/hour activity counts (rollups)
+    "rollover": run_rollover,                  # move old summary rows into monthly archive tabs (tab_rollover)
+}
+
+
+def run_jobs(config, only=None):
+    """Run every job in one process so they share the Slack session, user/channel caches and
+    Sheets client. A failing job is reported and the rest still run. Returns [(name, ok)]."""
+    defaults = config.get("defaults", {})
+    if defaults.get("workspace_id"):
+        import push_general_to_project_summary
+        push_general_to_project_summary.WORKSPACE_ID = defaults["workspace_id"]
+    jobs = [
+        (job.get("name") or f"{job['type']} #{i + 1}", job) for i, job in enumerate(config.get("jobs", []))
+    ]
+    jobs = [(name, job) for name, job in jobs if not only or name in only]
+    try:
+        preflight_jobs([job for _, job in jobs], auto_join=defaults.get("auto_join", False))
+    except Exception as e:
+        print(f"⚠️ Membership preflight failed, jobs will find out per channel: {e}")
+    results = []
+    for name, job in jobs:
+        job = {**{k: v for k, v in defaults.items() if k not in ("workspace_id", "auto_join")}, **job}
+        print(f"\n▶️ {name}")
+        start = time.perf_counter()
+        try:
+            ok = JOB_TYPES[job["type"]](job) is not False
+        except Exception as e:
+            print(f"❌ {name} failed: {e}")
+            ok = False
+        print(f"{'✅' if ok else '❌'} {name} ({time.perf_counter() - start:.1f}s)")
+        results.append((name, ok))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run every configured Slack -> Sheets job in one process")
+    parser.add_argument("--config", default=DEFAULT_CONFIG_FILE,
+                        help="Jobs config (TOML, or YAML with PyYAML); see daily_jobs.example.toml")
+    parser.add_argument("--only", nargs="*", help="Only run the jobs with these names")
+    parser.add_argument("--list", action="store_true", help="List the configured jobs and exit")
+    parser.add_argument("--report", default=RUN_REPORT_FILE,
+                        help="Write a JSON run report (API calls, latencies, 429s, rows written) here")
+    parser.add_argument("--prometheus", default=PROMETHEUS_TEXTFILE,
+                        help="Write the run metrics as a Prometheus textfile-collector file here")
+    args = parser.parse_args()
+
+    if not SLACK_BOT_TOKEN:
+        print("Error: SLACK_BOT_TOKEN not set in environment. Please add it to your .env file.")
+        return 1
+    if not os.path.exists(args.config):
+        print(f"Error: config {args.config} not found. Copy daily_jobs.example.toml to daily_jobs.toml to start.")
+        return 1
+    config = load_config(args.config)
+    if args.list:
+        for i, job in enumerate(config.get("jobs", [])):
+            print(f"{job.get('name') or job['type'] + ' #' + str(i + 1)}: {job['type']} -> '{job.get('tab', '(default tab)')}'")
+        return 0
+    results = run_jobs(config, only=args.only)
+    print(metrics.summary_line())
+    write_reports(args.report, args.prometheus)
+    failed = [name for name, ok in results if not ok]
+    print(f"\n{len(results) - len(failed)}/{len(results)} jobs succeeded" + (f"; failed: {', '.join(failed)}" if failed else ""))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,263 @@
+import os
+import hmac
+import json
+import time
+import hashlib
+import argparse
+import threading
+from collections import OrderedDict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from dotenv import load_dotenv
+
+from row_index import RowIndex
+from message_store import get_message_store
+import push_general_to_project_summary as project_summary
+
+# Load .env from project root
+env_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.env'))
+load_dotenv(env_path)
+
+SLACK_SIGNING_SECRET = os.getenv("SLACK_SIGNING_SECRET")
+BATCH_SIZE = 50         # flush as soon as this many messages are buffered...
+FLUSH_INTERVAL = 10.0   # ...or this many seconds after the first one arrived
+MAX_SIGNATURE_AGE = 60 * 5  # Slack's replay window for X-Slack-Request-Timestamp
+# Subtypes that edit or hide existing messages rather than post new ones
+IGNORED_SUBTYPES = {"message_changed", "message_deleted", "message_replied"}
+
+
+def verify_signature(signing_secret, timestamp, body, signature, now=None):
+    """Check Slack's v0 request signature (https://api.slack.com/authentication/verifying-requests-from-slack)"""
+    try:
+        if abs((now or time.time()) - int(timestamp)) > MAX_SIGNATURE_AGE:
+            return False
+    except (TypeError, ValueError):
+        return False
+    basestring = b"v0:" + timestamp.encode() + b":" + body
+    expected = "v0=" + hmac.new(signing_secret.encode(), basestring, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature or "")
+
+
+class MessageBatcher:
+    """Buffers message events and hands them to `sink` in micro-batches on a background thread.
+
+    `sink` receives {channel_id: [messages newest first]} and returns True once written;
+    on False the batch is put back and retried on the next flush.
+    """
+
+    def __init__(self, sink, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._first_at = None
+        self._retry_at = 0  # after a failed flush, hold off until then
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def add(self, channel_id, message):
+        with self._cond:
+            if not self._buffer:
+                self._first_at = time.monotonic()
+            self._buffer.append((channel_id, message))
+            if len(self._buffer) >= self.batch_size:
+                self._cond.notify()
+
+    def pending(self):
+        with self._cond:
+            return len(self._buffer)
+
+    def _take_batch(self):
+        with self._cond:
+            while not self._stopping:
+                backoff = self._retry_at - time.monotonic()
+                if backoff > 0:
+                    self._cond.wait(backoff)
+                    continue
+                if len(self._buffer) >= self.batch_size:
+                    break
+                if self._buffer and time.monotonic() - self._first_at >= self.flush_interval:
+                    break
+                timeout = self.flush_interval if not self._buffer else max(
+                    0.0, self.flush_interval - (time.monotonic() - self._first_at))
+                self._cond.wait(timeout)
+            batch, self._buffer = self._buffer, []
+            return batch
+
+    def _flush(self, batch):
+        if not batch:
+            return
+        by_channel = {}
+        for channel_id, message in batch:
+            by_channel.setdefault(channel_id, []).append(message)
+        for messages in by_channel.values():
+            messages.sort(key=lambda m: float(m.get("ts", 0)), reverse=True)
+        try:
+            ok = self.sink(by_channel)
+        except Exception as e:
+            print(f"❌ Event batch flush failed: {e}")
+            ok = False
+        if not ok:
+            with self._cond:
+                self._buffer = batch + self._buffer
+                self._first_at = time.monotonic()
+                self._retry_at = self._first_at + self.flush_interval
+
+    def _run(self):
+        while True:
+            self._flush(self._take_batch())
+            with self._cond:
+                if self._stopping:
+                    break
+        # One last attempt for anything requeued by a failed flush
+        with self._cond:
+            batch, self._buffer = self._buffer, []
+        self._flush(batch)
+        if self.pending():
+            print(f"❌ {self.pending()} buffered messages could not be written before shutdown")
+
+    def stop(self):
+        """Flush whatever is buffered and stop the background thread"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        self._thread.join()
+
+
+class EventReceiver:
+    """Slack Events API endpoint: verifies requests, acks immediately, buffers message events"""
+
+    def __init__(self, batcher, signing_secret=SLACK_SIGNING_SECRET, channels=None,
+                 host="0.0.0.0", port=3000, path="/slack/events"):
+        if not signing_secret:
+            raise RuntimeError("SLACK_SIGNING_SECRET not set in environment. Please add it to your .env file.")
+        self.batcher = batcher
+        self.signing_secret = signing_secret
+        self.channels = set(channels) if channels else None
+        self.path = path
+        self.received = 0
+        self._seen_events = OrderedDict()  # event_id -> None, bounded; Slack retries on slow acks
+        self._lock = threading.Lock()
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                status, payload = receiver.handle(self.path, self.headers, body)
+                data = json.dumps(payload).encode() if payload is not None else b""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+
+    @property
+    def port(self):
+        return self._httpd.server_port
+
+    def _is_duplicate(self, event_id):
+        if not event_id:
+            return False  # nothing to dedup on
+        with self._lock:
+            if event_id in self._seen_events:
+                return True
+            self._seen_events[event_id] = None
+            if len(self._seen_events) > 10000:
+                self._seen_events.popitem(last=False)
+            return False
+
+    def handle(self, path, headers, body):
+        """Return (HTTP status, JSON payload) for one Events API request"""
+        if path != self.path:
+            return 404, {"ok": False}
+        if not verify_signature(self.signing_secret, headers.get("X-Slack-Request-Timestamp"),
+                                body, headers.get("X-Slack-Signature")):
+            return 401, {"ok": False, "error": "invalid_signature"}
+        try:
+            envelope = json.loads(body)
+        except ValueError:
+            return 400, {"ok": False, "error": "invalid_json"}
+        if envelope.get("type") == "url_verification":
+            return 200, {"challenge": envelope.get("challenge")}
+        if envelope.get("type") != "event_callback" or self._is_duplicate(envelope.get("event_id")):
+            return 200, None
+        event = envelope.get("event", {})
+        if event.get("type") != "message" or event.get("subtype") in IGNORED_SUBTYPES:
+            return 200, None
+        channel_id = event.get("channel")
+        if self.channels is not None and channel_id not in self.channels:
+            return 200, None
+        message = {key: event[key] for key in ("ts", "user", "text", "subtype", "bot_id", "thread_ts") if key in event}
+        if event.get("thread_ts") and event.get("thread_ts") != event.get("ts"):
+            # Thread replies are not top-level rows in the summary tab, but the message store
+            # (threads, rollups) still records them
+            get_message_store().add_messages(channel_id, [message])
+        else:
+            self.batcher.add(channel_id, message)
+        with self._lock:
+            self.received += 1
+        return 200, None
+
+    def serve_forever(self):
+        self._httpd.serve_forever()
+
+    def start(self):
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+def make_sheet_sink():
+    """Sink that records batches in the message store and upserts them into the project summary tab.
+
+    Pushed events leave the `--incremental` polling cursors alone: events missed while the
+    receiver was down must still be picked up by polling, and rows it re-fetches are keyed
+    upserts, so nothing is duplicated. The row index is loaded afresh for every batch so
+    entries saved by a concurrent polling run are not overwritten.
+    """
+    def sink(messages_by_channel):
+        store = get_message_store()
+        for channel_id, messages in messages_by_channel.items():
+            store.add_messages(channel_id, messages)
+        row_index = RowIndex(project_summary.SHEET_ID, project_summary.TAB_NAME, project_summary.ROW_WIDTH,
+                             legacy_key=project_summary.legacy_row_key)
+        return project_summary.write_messages_to_sheet(messages_by_channel, row_index=row_index)
+    return sink
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Receive Slack message events and stream them to the project summary tab")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", 3000)))
+    parser.add_argument("--path", default="/slack/events", help="Request URL path configured in the Slack app")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--flush-interval", type=float, default=FLUSH_INTERVAL, help="Seconds")
+    parser.add_argument("--channels", nargs="*", help="Only ingest these channel IDs (default: all)")
+    args = parser.parse_args()
+
+    batcher = MessageBatcher(make_sheet_sink(), args.batch_size, args.flush_interval).start()
+    receiver = EventReceiver(batcher, channels=args.channels, port=args.port, path=args.path)
+    print(f"👂 Listening for Slack events on :{receiver.port}{args.path}")
+    try:
+        receiver.serve_forever()
+    except KeyboardInterrupt:
+        print("Stopping, flushing buffered messages...")
+    finally:
+        receiver.stop()
+        batcher.stop()
+
+
+if __name__ == "__main__":
+    main()
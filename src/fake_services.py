@@ -0,0 +1,505 @@
+"""Offline stand-ins for Google Sheets (in-memory service) and the Slack Web API (local HTTP server)"""
+import re
+import hmac
+import json
+import time
+import random
+import hashlib
+import threading
+import urllib.request
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+# --- Google Sheets ---
+
+_A1_CELL = re.compile(r"^([A-Z]*)(\d*)$")
+
+
+def _col_to_index(col):
+    index = 0
+    for ch in col:
+        index = index * 26 + (ord(ch) - ord('A') + 1)
+    return index - 1
+
+
+def _index_to_col(index):
+    col = ""
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        col = chr(ord('A') + rem) + col
+    return col
+
+
+def parse_a1(range_name, default_tab):
+    """Split an A1 range into (tab, first row, first col, last row, last col); bounds are 0-based, None = open"""
+    if "!" in range_name:
+        tab, cells = range_name.rsplit("!", 1)
+        tab = tab.strip("'")
+    else:
+        tab, cells = default_tab, range_name
+    start, _, end = cells.partition(":")
+    end = end or start
+    start_col, start_row = _A1_CELL.match(start).groups()
+    end_col, end_row = _A1_CELL.match(end).groups()
+    return (
+        tab,
+        int(start_row) - 1 if start_row else 0,
+        _col_to_index(start_col) if start_col else 0,
+        int(end_row) - 1 if end_row else None,
+        _col_to_index(end_col) if end_col else None,
+    )
+
+
+class _Request:
+    """Deferred call, counted and delayed only when execute() runs (like googleapiclient's HttpRequest)"""
+
+    def __init__(self, service, name, fn):
+        self._service = service
+        self._name = name
+        self._fn = fn
+
+    def execute(self):
+        service = self._service
+        with service.lock:
+            service.calls[self._name] += 1
+        if service.latency:
+            time.sleep(service.latency)
+        with service.lock:
+            return self._fn()
+
+
+class _Values:
+    def __init__(self, service):
+        self._s = service
+
+    def get(self, spreadsheetId, range):
+        return _Request(self._s, "values.get", lambda: self._s._get(range))
+
+    def batchGet(self, spreadsheetId, ranges):
+        return _Request(self._s, "values.batchGet",
+                        lambda: {"valueRanges": [self._s._get(r) for r in ranges]})
+
+    def update(self, spreadsheetId, range, valueInputOption, body):
+        return _Request(self._s, "values.update", lambda: self._s._update(range, body["values"]))
+
+    def batchUpdate(self, spreadsheetId, body):
+        def run():
+            responses = [self._s._update(d["range"], d["values"]) for d in body["data"]]
+            return {"totalUpdatedRows": sum(r["updatedRows"] for r in responses),
+                    "totalUpdatedCells": sum(r["updatedCells"] for r in responses), "responses": responses}
+        return _Request(self._s, "values.batchUpdate", run)
+
+    def append(self, spreadsheetId, range, valueInputOption, body, insertDataOption=None):
+        return _Request(self._s, "values.append", lambda: self._s._append(range, body["values"]))
+
+    def clear(self, spreadsheetId, range):
+        return _Request(self._s, "values.clear", lambda: self._s._clear(range))
+
+
+class _Spreadsheets:
+    def __init__(self, service):
+        self._s = service
+
+    def get(self, spreadsheetId, fields=None):
+        return _Request(self._s, "spreadsheets.get", self._s._metadata)
+
+    def batchUpdate(self, spreadsheetId, body):
+        return _Request(self._s, "spreadsheets.batchUpdate", lambda: self._s._batch_update(body["requests"]))
+
+    def values(self):
+        return _Values(self._s)
+
+
+class FakeSheetsService:
+    """In-memory replacement for build('sheets', 'v4'); pass it as GoogleSheetsClient(service=...)"""
+
+    def __init__(self, tabs=None, title="Fake Sheet", latency=0.0):
+        self.title = title
+        self.latency = latency
+        self.lock = threading.RLock()
+        self.calls = Counter()
+        self.cells_written = 0
+        # tab name -> list of rows (lists of strings)
+        self.tabs = {"Sheet1": []}
+        if tabs:
+            self.tabs = {name: [list(row) for row in rows] for name, rows in tabs.items()}
+        self._sheet_ids = {name: i for i, name in enumerate(self.tabs)}
+
+    def spreadsheets(self):
+        return _Spreadsheets(self)
+
+    @property
+    def default_tab(self):
+        return next(iter(self.tabs))
+
+    def _grid(self, tab):
+        if tab not in self.tabs:
+            raise ValueError(f"Unable to parse range: {tab}")
+        return self.tabs[tab]
+
+    def _metadata(self):
+        return {
+            "properties": {"title": self.title},
+            "sheets": [{"properties": {
+                "title": name, "sheetId": self._sheet_ids[name],
+                # New sheets start with a 1000 x 26 grid, like real ones
+                "gridProperties": {"rowCount": max(1000, len(rows)),
+                                   "columnCount": max([26] + [len(row) for row in rows])},
+            }} for name, rows in self.tabs.items()],
+        }
+
+    def _get(self, range_name):
+        tab, r0, c0, r1, c1 = parse_a1(range_name, self.default_tab)
+        grid = self._grid(tab)
+        last_row = len(grid) - 1 if r1 is None else min(r1, len(grid) - 1)
+        values = []
+        for row in grid[r0:last_row + 1]:
+            cells = row[c0:None if c1 is None else c1 + 1]
+            while cells and cells[-1] == "":
+                cells = cells[:-1]
+            values.append(cells)
+        while values and not values[-1]:
+            values.pop()
+        result = {"range": range_name, "majorDimension": "ROWS"}
+        if values:
+            result["values"] = values
+        return result
+
+    def _write(self, tab, r0, c0, values):
+        grid = self._grid(tab)
+        for i, row in enumerate(values):
+            while len(grid) <= r0 + i:
+                grid.append([])
+            target = grid[r0 + i]
+            while len(target) < c0 + len(row):
+                target.append("")
+            for j, value in enumerate(row):
+                target[c0 + j] = "" if value is None else str(value)
+        cells = sum(len(row) for row in values)
+        self.cells_written += cells
+        return cells
+
+    def _update(self, range_name, values):
+        tab, r0, c0, _, _ = parse_a1(range_name, self.default_tab)
+        cells = self._write(tab, r0, c0, values)
+        return {"updatedRange": range_name, "updatedRows": len(values), "updatedCells": cells}
+
+    def _append(self, range_name, values):
+        tab, _, c0, _, _ = parse_a1(range_name, self.default_tab)
+        grid = self._grid(tab)
+        r0 = len(grid)
+        while r0 > 0 and not any(grid[r0 - 1]):
+            r0 -= 1
+        cells = self._write(tab, r0, c0, values)
+        width = max((len(row) for row in values), default=1)
+        updated = f"'{tab}'!{_index_to_col(c0)}{r0 + 1}:{_index_to_col(c0 + width - 1)}{r0 + len(values)}"
+        return {"updates": {"updatedRange": updated, "updatedRows": len(values), "updatedCells": cells}}
+
+    def _clear(self, range_name):
+        tab, r0, c0, r1, c1 = parse_a1(range_name, self.default_tab)
+        grid = self._grid(tab)
+        last_row = len(grid) - 1 if r1 is None else min(r1, len(grid) - 1)
+        for row in grid[r0:last_row + 1]:
+            for j in range(c0, len(row) if c1 is None else min(c1 + 1, len(row))):
+                row[j] = ""
+        return {"clearedRange": range_name}
+
+    def _batch_update(self, requests):
+        replies = []
+        for request in requests:
+            if "addSheet" in request:
+                title = request["addSheet"]["properties"]["title"]
+                if title in self.tabs:
+                    raise ValueError(f"A sheet with the name \"{title}\" already exists")
+                self.tabs[title] = []
+                self._sheet_ids[title] = max(self._sheet_ids.values(), default=-1) + 1
+                replies.append({"addSheet": {"properties": {"title": title, "sheetId": self._sheet_ids[title]}}})
+            elif "deleteDimension" in request:
+                rng = request["deleteDimension"]["range"]
+                tab = next(name for name, sid in self._sheet_ids.items() if sid == rng["sheetId"])
+                del self.tabs[tab][rng["startIndex"]:rng["endIndex"]]
+                replies.append({})
+            else:
+                raise ValueError(f"Unsupported batchUpdate request: {list(request)}")
+        return {"replies": replies}
+
+
+# --- Slack Web API ---
+
+# Requests per minute per method, mirroring slack_api.METHOD_TIERS
+_FAKE_TIER_LIMITS = {
+    "conversations.list": 20,
+    "users.list": 20,
+    "conversations.history": 50,
+    "conversations.replies": 50,
+    "conversations.info": 50,
+    "conversations.join": 50,
+    "users.conversations": 50,
+    "users.info": 100,
+}
+
+_WORDS = ("deploy release build test review ticket customer epg video ingest schedule "
+          "outage fix rollback metrics dashboard sync standup blocker qa staging prod "
+          "latency encoder playlist feed partner launch migration alert").split()
+
+
+def make_workspace(num_channels, messages_per_channel=20, num_users=50, thread_ratio=0.2,
+                   replies_per_thread=3, seed=42, start_ts=1_700_000_000):
+    """Build a deterministic synthetic workspace dict for FakeSlackServer"""
+    rng = random.Random(seed)
+    users = [
+        {"id": f"U{i:08d}", "name": f"user{i}", "updated": start_ts,
+         "profile": {"display_name": f"User {i}", "real_name": f"Real User {i}"}}
+        for i in range(num_users)
+    ]
+    user_ids = [u["id"] for u in users]
+    channels, history, replies = [], {}, {}
+    for c in range(num_channels):
+        channel_id = f"C{c:08d}"
+        channels.append({"id": channel_id, "name": f"channel-{c}", "is_member": c % 10 != 9,
+                         "is_archived": False, "is_private": False})
+        messages = []
+        ts = start_ts + c
+        for m in range(messages_per_channel):
+            ts += rng.randint(30, 3600)
+            words = rng.sample(_WORDS, 6)
+            if rng.random() < 0.3:
+                words.insert(2, f"<@{rng.choice(user_ids)}>")
+            if rng.random() < 0.1:
+                words.append(f"<#{channel_id}|channel-{c}>")
+            if rng.random() < 0.1:
+                words.append("<https://example.com/ticket|ticket>")
+            msg = {"type": "message", "user": rng.choice(user_ids), "text": " ".join(words), "ts": f"{ts}.{m:06d}"}
+            if rng.random() < thread_ratio:
+                thread = []
+                reply_ts = ts
+                for r in range(replies_per_thread):
+                    reply_ts += rng.randint(10, 600)
+                    thread.append({"type": "message", "user": rng.choice(user_ids),
+                                   "text": " ".join(rng.sample(_WORDS, 5)),
+                                   "ts": f"{reply_ts}.{r:06d}", "thread_ts": msg["ts"]})
+                msg.update(thread_ts=msg["ts"], reply_count=len(thread), latest_reply=thread[-1]["ts"])
+                replies[(channel_id, msg["ts"])] = thread
+            messages.append(msg)
+        history[channel_id] = list(reversed(messages))  # newest first, like Slack
+    return {"channels": channels, "users": users, "history": history, "replies": replies}
+
+
+class FakeSlackServer:
+    """Local HTTP server answering the Slack Web API methods this repo uses.
+
+    `latency` is added to every response; `rate_limit_scale` multiplies the per-method
+    tier budgets (keep it equal to SLACK_RATE_LIMIT_SCALE on the client side).
+    """
+
+    def __init__(self, workspace=None, latency=0.0, rate_limit_scale=1.0):
+        self.latency = latency
+        self.rate_limit_scale = rate_limit_scale
+        self._lock = threading.Lock()
+        self._httpd = None
+        self.load(workspace or make_workspace(0))
+
+    def load(self, workspace):
+        """Swap in a new workspace and reset counters and rate-limit windows"""
+        with self._lock:
+            self.workspace = workspace
+            self.calls = Counter()
+            self.rate_limited = Counter()
+            self.bytes_sent = 0
+            self._windows = {}  # method -> (window start, count)
+            self._channels = {ch["id"]: ch for ch in workspace["channels"]}
+            self._users = {u["id"]: u for u in workspace["users"]}
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._httpd.server_port}"
+
+    def start(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                method = parsed.path.strip("/")
+                params = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+                status, payload, headers = server.handle(method, params)
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _over_limit(self, method):
+        limit = _FAKE_TIER_LIMITS.get(method, 50) * self.rate_limit_scale
+        now = time.monotonic()
+        with self._lock:
+            start, count = self._windows.get(method, (now, 0))
+            if now - start >= 60:
+                start, count = now, 0
+            if count >= limit:
+                return max(1, int(60 - (now - start)) + 1)
+            self._windows[method] = (start, count + 1)
+        return 0
+
+    def handle(self, method, params):
+        with self._lock:
+            self.calls[method] += 1
+        if self.latency:
+            time.sleep(self.latency)
+        retry_after = self._over_limit(method)
+        if retry_after:
+            with self._lock:
+                self.rate_limited[method] += 1
+            return 429, {"ok": False, "error": "ratelimited"}, {"Retry-After": str(retry_after)}
+        handler = getattr(self, "_" + method.replace(".", "_"), None)
+        if handler is None:
+            return 200, {"ok": False, "error": "unknown_method"}, {}
+        payload = handler(params)
+        with self._lock:
+            self.bytes_sent += len(json.dumps(payload))
+        return 200, payload, {}
+
+    @staticmethod
+    def _page(items, params, key, default_limit=100):
+        offset = int(params.get("cursor") or 0)
+        limit = int(params.get("limit") or default_limit)
+        page = items[offset:offset + limit]
+        next_offset = offset + limit
+        payload = {"ok": True, key: page, "response_metadata": {"next_cursor": ""}}
+        if next_offset < len(items):
+            payload["has_more"] = True
+            payload["response_metadata"]["next_cursor"] = str(next_offset)
+        return payload
+
+    def _conversations_list(self, params):
+        # Private channels are only visible to members, as in Slack
+        channels = [ch for ch in self.workspace["channels"] if ch.get("is_member") or not ch.get("is_private")]
+        if params.get("exclude_archived") in ("true", "True", "1"):
+            channels = [ch for ch in channels if not ch.get("is_archived")]
+        return self._page(channels, params, "channels")
+
+    def _conversations_info(self, params):
+        channel = self._channels.get(params.get("channel"))
+        if channel is None:
+            return {"ok": False, "error": "channel_not_found"}
+        return {"ok": True, "channel": channel}
+
+    def _conversations_join(self, params):
+        channel = self._channels.get(params.get("channel"))
+        if channel is None or (channel.get("is_private") and not channel.get("is_member")):
+            return {"ok": False, "error": "channel_not_found"}
+        if channel.get("is_private"):
+            return {"ok": False, "error": "method_not_supported_for_channel_type"}
+        channel["is_member"] = True
+        return {"ok": True, "channel": channel}
+
+    def _conversations_history(self, params):
+        channel = self._channels.get(params.get("channel"))
+        if channel is None:
+            return {"ok": False, "error": "channel_not_found"}
+        if not channel.get("is_member"):
+            return {"ok": False, "error": "not_in_channel"}
+        messages = self.workspace["history"].get(channel["id"], [])
+        oldest = float(params.get("oldest") or 0)
+        latest = float(params.get("latest") or "inf")
+        if oldest or latest != float("inf"):
+            if params.get("inclusive") in ("true", "True", "1"):
+                messages = [m for m in messages if oldest <= float(m["ts"]) <= latest]
+            else:
+                messages = [m for m in messages if oldest < float(m["ts"]) < latest]
+        return self._page(messages, params, "messages")
+
+    def _conversations_replies(self, params):
+        channel_id, ts = params.get("channel"), params.get("ts")
+        parent = next((m for m in self.workspace["history"].get(channel_id, []) if m["ts"] == ts), None)
+        if parent is None:
+            return {"ok": False, "error": "thread_not_found"}
+        thread = [parent] + self.workspace["replies"].get((channel_id, ts), [])
+        return self._page(thread, params, "messages")
+
+    def _users_list(self, params):
+        return self._page(self.workspace["users"], params, "members")
+
+    def _users_info(self, params):
+        user = self._users.get(params.get("user"))
+        if user is None:
+            return {"ok": False, "error": "user_not_found"}
+        return {"ok": True, "user": user}
+
+    def _users_conversations(self, params):
+        member_of = [ch for ch in self.workspace["channels"] if ch.get("is_member") and not ch.get("is_archived")]
+        return self._page(member_of, params, "channels")
+
+
+# --- Slack Events API ---
+
+class FakeEventSource:
+    """Posts signed Events API callbacks to a local receiver, the way Slack delivers them"""
+
+    def __init__(self, url, signing_secret, team_id="T2AAHSB5F"):
+        self.url = url
+        self.signing_secret = signing_secret
+        self.team_id = team_id
+        self._counter = 0
+
+    def post(self, envelope, timestamp=None, signature=None):
+        """Sign and POST one envelope; returns (status, parsed JSON body or None)"""
+        body = json.dumps(envelope).encode()
+        timestamp = str(int(timestamp or time.time()))
+        if signature is None:
+            basestring = b"v0:" + timestamp.encode() + b":" + body
+            signature = "v0=" + hmac.new(self.signing_secret.encode(), basestring, hashlib.sha256).hexdigest()
+        request = urllib.request.Request(self.url, data=body, method="POST", headers={
+            "Content-Type": "application/json",
+            "X-Slack-Request-Timestamp": timestamp,
+            "X-Slack-Signature": signature,
+        })
+        try:
+            with urllib.request.urlopen(request) as resp:
+                data = resp.read()
+                return resp.status, json.loads(data) if data else None
+        except urllib.error.HTTPError as e:
+            return e.code, None
+
+    def url_verification(self, challenge="fake-challenge"):
+        return self.post({"type": "url_verification", "token": "fake", "challenge": challenge})
+
+    def message(self, channel_id, text, user="U00000000", ts=None, event_id=None, **extra):
+        """Deliver a `message` event; returns the event's ts"""
+        self._counter += 1
+        ts = ts or f"{time.time():.6f}"
+        event = {"type": "message", "channel": channel_id, "user": user, "text": text, "ts": ts, **extra}
+        self.post({
+            "type": "event_callback",
+            "team_id": self.team_id,
+            "event_id": event_id or f"Ev{self._counter:010d}",
+            "event_time": int(float(ts)),
+            "event": event,
+        })
+        return ts
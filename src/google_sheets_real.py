@@ -1,37 +1,76 @@
 import os
+import threading
 from google.oauth2.service_account import Credentials
 from googleapiclient.discovery import build
 from datetime import datetime
 from dotenv import load_dotenv
+from instrumentation import TracedSheetsService
 
 # Load .env from parent directory
 load_dotenv(os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env'))
 
+SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CREDENTIALS_FILE = os.path.join(PROJECT_ROOT, 'credentials.json')
+
+_shared_client = None
+_shared_client_lock = threading.Lock()
+
+
 class GoogleSheetsClient:
-    def __init__(self):
-        # Simple hardcoded path to credentials
-        creds_file = "/Users/jcris/Projects/Slack/credentials.json"
-        
+    def __init__(self, service=None, credentials=None, credentials_file=None, scopes=SCOPES):
+        """Configure a client; nothing is loaded or built until the first API call.
+
+        Pass `service` to use a pre-built service (e.g. fake_services.FakeSheetsService),
+        `credentials` for ready-made google.auth credentials, or `credentials_file` for a
+        service-account JSON path (default: $GOOGLE_CREDENTIALS_FILE, then credentials.json
+        in the project root).
+        """
+        # Every execute() goes through the tracing proxy so run reports see all Sheets calls
+        self._service = TracedSheetsService(service) if service is not None else None
+        self._credentials = credentials
+        creds_file = credentials_file or os.getenv("GOOGLE_CREDENTIALS_FILE") or DEFAULT_CREDENTIALS_FILE
+        self.credentials_file = os.path.join(PROJECT_ROOT, creds_file)  # relative paths are from the project root
+        self.scopes = scopes
+        self._service_lock = threading.Lock()
+        self._connected = set()
+        # sheet_id -> spreadsheets.get metadata (tabs and grid sizes) from the last connection test
+        self.metadata = {}
+        # Writes buffered by queue_write/queue_append until flush()
+        self._pending_updates = {}
+        self._pending_appends = {}
+        # (sheet_id, range) -> A1 range the last flush actually appended to
+        self.appended_ranges = {}
+
+    def _load_credentials(self):
+        creds_file = self.credentials_file
         print(f"🔍 Looking for credentials at: {creds_file}")
-        print(f"📁 File exists: {os.path.exists(creds_file)}")
-        
         if not os.path.exists(creds_file):
             print(f"❌ Credentials file not found!")
             raise FileNotFoundError(f"Credentials file not found: {creds_file}")
-        
-        credentials = Credentials.from_service_account_file(
-            creds_file,
-            scopes=['https://www.googleapis.com/auth/spreadsheets']
-        )
-        
-        self.service = build('sheets', 'v4', credentials=credentials)
-    
+        return Credentials.from_service_account_file(creds_file, scopes=self.scopes)
+
+    @property
+    def service(self):
+        """Sheets service, built on first use from the discovery document bundled with the library"""
+        if self._service is None:
+            with self._service_lock:
+                if self._service is None:
+                    credentials = self._credentials or self._load_credentials()
+                    self._service = TracedSheetsService(build('sheets', 'v4', credentials=credentials,
+                                                              static_discovery=True, cache_discovery=False))
+        return self._service
+
     def test_connection(self, sheet_id):
-        """Test connection to Google Sheets"""
+        """Test connection to Google Sheets (once per sheet for the life of the client)"""
+        if sheet_id in self._connected:
+            return True
         try:
             sheet_metadata = self.service.spreadsheets().get(spreadsheetId=sheet_id).execute()
             title = sheet_metadata.get('properties', {}).get('title', 'Unknown')
             print(f"✅ Successfully connected to sheet: {title}")
+            self.metadata[sheet_id] = sheet_metadata
+            self._connected.add(sheet_id)
             return True
         except Exception as e:
             print(f"❌ Google Sheets connection failed: {e}")
@@ -57,98 +96,48 @@ class GoogleSheetsClient:
             print(f"❌ Failed to write data: {e}")
             return False
 
-def write_integration_testing_messages(sheet_id, slack_token, channel_name='integration_testing', num_messages=5):
-    """
-    Fetch last N messages from the given Slack channel and write them to the Google Sheet.
-    Each row: [Timestamp, User Display Name, Message Text]
-    """
-    import requests
-    from datetime import datetime
-
-    # 1. List channels to find the channel ID
-    url = "https://slack.com/api/conversations.list"
-    headers = {"Authorization": f"Bearer {slack_token}"}
-    params = {"exclude_archived": True, "limit": 1000}
-    resp = requests.get(url, headers=headers, params=params)
-    data = resp.json()
-    if not data.get("ok"):
-        print("Error listing channels:", data)
-        return
-    channels = data["channels"]
-    channel_id = None
-    for ch in channels:
-        if ch["name"] == channel_name:
-            channel_id = ch["id"]
-            break
-    if not channel_id:
-        print(f"Channel '{channel_name}' not found.")
-        return
+    def queue_write(self, sheet_id, cell_range, data):
+        """Buffer a range write; nothing is sent until flush() is called"""
+        values = data if data and isinstance(data[0], list) else [data]
+        self._pending_updates.setdefault(sheet_id, []).append({'range': cell_range, 'values': values})
 
-    # 2. Fetch last N messages
-    url = "https://slack.com/api/conversations.history"
-    params = {"channel": channel_id, "limit": num_messages}
-    resp = requests.get(url, headers=headers, params=params)
-    data = resp.json()
-    if not data.get("ok"):
-        print(f"Error fetching messages for {channel_id}:", data)
-        return
-    messages = data["messages"]
-
-    # 3. Helper to resolve user ID to display name
-    def get_user_display_name(user_id):
-        url = f"https://slack.com/api/users.info"
-        params = {"user": user_id}
-        resp = requests.get(url, headers=headers, params=params)
-        data = resp.json()
-        if data.get("ok") and "user" in data:
-            profile = data["user"].get("profile", {})
-            return profile.get("display_name") or profile.get("real_name") or user_id
-        return user_id
-
-    # 4. Prepare rows (oldest first)
-    rows = []
-    automation_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    print("\n--- MESSAGES FOUND IN SLACK ---")
-    for msg in reversed(messages):
-        ts = float(msg.get('ts', 0))
-        dt = datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S')
-        user_id = msg.get('user', 'bot/system')
-        text = msg.get('text', '')
-        if user_id != 'bot/system':
-            display_name = get_user_display_name(user_id)
-        else:
-            display_name = user_id
-        print(f"[{dt}] {display_name}: {text}")
-        # Only user display name, never Slack ID
-        rows.append([dt, f"{display_name}: {text}", f"Automated by Slack2Sheets at {automation_time}"])
-    print("--- END SLACK MESSAGES ---\n")
+    def queue_append(self, sheet_id, range_name, data):
+        """Buffer rows to append after the last row of range_name"""
+        values = data if data and isinstance(data[0], list) else [data]
+        self._pending_appends.setdefault((sheet_id, range_name), []).extend(values)
 
-    # 5. Find the 'Meeting Cadence' header in column A (any row)
-    client = GoogleSheetsClient()
-    client.test_connection(sheet_id)
-    sheet = client.service.spreadsheets().values().get(
-        spreadsheetId=sheet_id,
-        range="A1:A100"
-    ).execute()
-    values = sheet.get('values', [])
-    header_row = None
-    for idx, row in enumerate(values):
-        if row and row[0].strip().lower() == 'meeting cadence':
-            header_row = idx + 1  # 1-based
-            break
-    if header_row is None:
-        print("❌ 'Meeting Cadence' header not found. Writing to A1 instead.")
-        start_row = 2
-        client.write_data(sheet_id, "A1:C1", ["Meeting Cadence", "Message", "Automation Info"])
-    else:
-        start_row = header_row + 1
+    def flush(self):
+        """Send all buffered writes: one batchUpdate per sheet plus one append per target range"""
+        ok = True
+        updates, self._pending_updates = self._pending_updates, {}
+        appends, self._pending_appends = self._pending_appends, {}
+        for sheet_id, data in updates.items():
+            try:
+                self.service.spreadsheets().values().batchUpdate(
+                    spreadsheetId=sheet_id,
+                    body={'valueInputOption': 'RAW', 'data': data}
+                ).execute()
+                print(f"✅ Wrote {len(data)} ranges in one batch update")
+            except Exception as e:
+                print(f"❌ Failed to batch update {len(data)} ranges: {e}")
+                ok = False
+        for (sheet_id, range_name), rows in appends.items():
+            self.appended_ranges.pop((sheet_id, range_name), None)
+            try:
+                resp = self.service.spreadsheets().values().append(
+                    spreadsheetId=sheet_id,
+                    range=range_name,
+                    valueInputOption='RAW',
+                    insertDataOption='INSERT_ROWS',
+                    body={'values': rows}
+                ).execute()
+                self.appended_ranges[(sheet_id, range_name)] = resp.get('updates', {}).get('updatedRange')
+                print(f"✅ Appended {len(rows)} rows to {range_name}")
+            except Exception as e:
+                print(f"❌ Failed to append {len(rows)} rows to {range_name}: {e}")
+                ok = False
+        return ok
 
-    # Write each Slack message row below the header, only to columns A-C
-    for i, row in enumerate(rows):
-        cell_range = f"A{start_row + i}:C{start_row + i}"
-        client.write_data(sheet_id, cell_range, row)
-    print(f"✅ Wrote {len(rows)} messages from #{channel_name} under 'Meeting Cadence'.")
-    
     def write_long_text(self, sheet_id, start_row, column, text):
         """Write long text across multiple rows in a single column"""
         try:
@@ -191,3 +180,85 @@ def write_integration_testing_messages(sheet_id, slack_token, channel_name='inte
         except Exception as e:
             print(f"❌ Failed to clear sheet: {e}")
             return False
+
+def get_sheets_client():
+    """Process-wide shared client, so every pipeline in a run reuses one auth setup and service"""
+    global _shared_client
+    with _shared_client_lock:
+        if _shared_client is None:
+            _shared_client = GoogleSheetsClient()
+        return _shared_client
+
+
+def set_sheets_client(client):
+    """Replace the shared client, e.g. with one wrapping fake_services.FakeSheetsService"""
+    global _shared_client
+    with _shared_client_lock:
+        _shared_client = client
+
+
+def write_integration_testing_messages(sheet_id, slack_token, channel_name='integration_testing', num_messages=5):
+    """
+    Fetch last N messages from the given Slack channel and write them to the Google Sheet.
+    Each row: [Timestamp, User Display Name, Message Text]
+    """
+    from datetime import datetime
+    from channel_index import get_channel_index
+    from channel_fetcher import fetch_history
+
+    # 1. Look up the channel ID in the cached channel index
+    channel_id = get_channel_index(slack_token).find_id(channel_name)
+    if not channel_id:
+        print(f"Channel '{channel_name}' not found.")
+        return
+
+    # 2. Fetch last N messages (also recorded in the local message store)
+    messages = fetch_history(slack_token, channel_id, limit=num_messages)
+    if messages is None:
+        return
+
+    # 3. Resolve user IDs to display names through the shared user directory
+    from user_directory import get_user_directory
+    users = get_user_directory(slack_token)
+
+    # 4. Prepare rows (oldest first)
+    rows = []
+    automation_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    print("\n--- MESSAGES FOUND IN SLACK ---")
+    for msg in reversed(messages):
+        ts = float(msg.get('ts', 0))
+        dt = datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S')
+        user_id = msg.get('user', 'bot/system')
+        text = msg.get('text', '')
+        if user_id != 'bot/system':
+            display_name = users.get_display_name(user_id)
+        else:
+            display_name = user_id
+        print(f"[{dt}] {display_name}: {text}")
+        # Only user display name, never Slack ID
+        rows.append([dt, f"{display_name}: {text}", f"Automated by Slack2Sheets at {automation_time}"])
+    print("--- END SLACK MESSAGES ---\n")
+
+    # 5. Find the 'Meeting Cadence' header in column A of the first tab (cached anchor lookup)
+    from sheet_anchors import get_anchor_resolver, MEETING_CADENCE
+    client = get_sheets_client()
+    client.test_connection(sheet_id)
+    anchors = get_anchor_resolver(client, sheet_id)
+    header_row = anchors.find(MEETING_CADENCE)
+    if header_row is None:
+        print("❌ 'Meeting Cadence' header not found. Writing to A1 instead.")
+        start_row = 2
+        client.queue_write(sheet_id, "A1:C1", ["Meeting Cadence", "Message", "Automation Info"])
+    else:
+        start_row = header_row + 1
+
+    # Write each Slack message row below the header, only to columns A-C
+    for i, row in enumerate(rows):
+        cell_range = f"A{start_row + i}:C{start_row + i}"
+        client.queue_write(sheet_id, cell_range, row)
+    if not client.flush():
+        return
+    if header_row is None:
+        # Only remember the new header once it is actually in the sheet
+        anchors.record(MEETING_CADENCE, 1)
+    print(f"✅ Wrote {len(rows)} messages from #{channel_name} under 'Meeting Cadence'.")
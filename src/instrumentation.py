@@ -0,0 +1,218 @@
+import os
+import json
+import time
+import atexit
+import threading
+from local_cache import write_atomic
+
+# Set either (or both) to have every script write its run report on exit
+RUN_REPORT_FILE = os.getenv("RUN_REPORT_FILE")
+PROMETHEUS_TEXTFILE = os.getenv("PROMETHEUS_TEXTFILE")
+PERCENTILES = (50, 90, 99)
+METRIC_PREFIX = "slack_summary"
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+class RunMetrics:
+    """Per-run counters and latencies for every Slack and Sheets API method; thread-safe"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started_at = time.time()
+            # (service, method) -> {"calls", "errors", "rate_limited", "retries", "bytes_sent",
+            #                       "bytes_received", "rows_written", "throttle_seconds", "latencies"}
+            self.methods = {}
+
+    def _entry(self, service, method):
+        entry = self.methods.get((service, method))
+        if entry is None:
+            entry = self.methods[(service, method)] = {
+                "calls": 0, "errors": 0, "rate_limited": 0, "retries": 0, "bytes_sent": 0,
+                "bytes_received": 0, "rows_written": 0, "throttle_seconds": 0.0, "latencies": [],
+            }
+        return entry
+
+    def record_call(self, service, method, seconds, ok=True, bytes_sent=0, bytes_received=0, rows_written=0,
+                    retries=0):
+        with self._lock:
+            entry = self._entry(service, method)
+            entry["calls"] += 1
+            entry["errors"] += 0 if ok else 1
+            entry["retries"] += retries
+            entry["bytes_sent"] += bytes_sent
+            entry["bytes_received"] += bytes_received
+            entry["rows_written"] += rows_written
+            entry["latencies"].append(seconds)
+
+    def record_rate_limited(self, service, method):
+        with self._lock:
+            self._entry(service, method)["rate_limited"] += 1
+
+    def record_throttle(self, service, method, seconds):
+        """Time a caller spent waiting for rate-limit budget before it could send"""
+        with self._lock:
+            self._entry(service, method)["throttle_seconds"] += seconds
+
+    def report(self):
+        """JSON-ready summary: totals per service and per method, with latency percentiles in ms"""
+        with self._lock:
+            methods = {key: dict(entry, latencies=sorted(entry["latencies"])) for key, entry in self.methods.items()}
+            started_at = self.started_at
+        report = {
+            "started_at": started_at,
+            "duration_seconds": round(time.time() - started_at, 3),
+            "services": {},
+            "methods": [],
+        }
+        for (service, method), entry in sorted(methods.items()):
+            latencies = entry.pop("latencies")
+            totals = report["services"].setdefault(service, {
+                "calls": 0, "errors": 0, "rate_limited": 0, "retries": 0, "bytes_sent": 0,
+                "bytes_received": 0, "rows_written": 0, "throttle_seconds": 0.0,
+            })
+            for key in totals:
+                totals[key] += entry[key]
+            entry["throttle_seconds"] = round(entry["throttle_seconds"], 3)
+            entry["latency_ms"] = {f"p{pct}": round(percentile(latencies, pct) * 1000, 1) for pct in PERCENTILES}
+            entry["latency_ms"]["max"] = round(latencies[-1] * 1000, 1) if latencies else 0.0
+            entry["latency_ms"]["total"] = round(sum(latencies) * 1000, 1)
+            report["methods"].append({"service": service, "method": method, **entry})
+        for totals in report["services"].values():
+            totals["throttle_seconds"] = round(totals["throttle_seconds"], 3)
+        return report
+
+    def summary_line(self):
+        parts = []
+        for service, totals in self.report()["services"].items():
+            parts.append(f"{service}: {totals['calls']} calls, {totals['rate_limited']} rate limited, "
+                         f"{totals['retries']} retries, {totals['rows_written']} rows written")
+        return "📈 " + ("; ".join(parts) if parts else "no API calls")
+
+    def write_json(self, path):
+        write_atomic(path, json.dumps(self.report(), indent=2))
+
+    def write_prometheus(self, path):
+        """Write a node_exporter textfile-collector file for this run"""
+        report = self.report()
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {METRIC_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{k}="{v}"' for k, v in labels.items())
+                lines.append(f"{METRIC_PREFIX}_{name}{{{label_text}}} {value}" if label_text
+                             else f"{METRIC_PREFIX}_{name} {value}")
+
+        def per_method(key):
+            return [({"service": m["service"], "method": m["method"]}, m[key]) for m in report["methods"]]
+
+        metric("api_calls_total", "counter", "API calls made during the last run", per_method("calls"))
+        metric("api_errors_total", "counter", "API calls that failed", per_method("errors"))
+        metric("api_rate_limited_total", "counter", "HTTP 429 responses", per_method("rate_limited"))
+        metric("api_retries_total", "counter", "Retried requests (429s and transport retries)", per_method("retries"))
+        metric("api_bytes_sent_total", "counter", "Request bytes (approximate)", per_method("bytes_sent"))
+        metric("api_bytes_received_total", "counter", "Response bytes", per_method("bytes_received"))
+        metric("rows_written_total", "counter", "Sheet rows written", per_method("rows_written"))
+        metric("rate_limit_wait_seconds_total", "counter", "Time spent waiting for rate-limit budget",
+               per_method("throttle_seconds"))
+        metric("api_latency_milliseconds", "summary", "API call latency", [
+            ({"service": m["service"], "method": m["method"], "quantile": str(pct / 100)}, m["latency_ms"][f"p{pct}"])
+            for m in report["methods"] for pct in PERCENTILES
+        ])
+        metric("run_duration_seconds", "gauge", "Wall time of the last run", [({}, report["duration_seconds"])])
+        metric("run_timestamp_seconds", "gauge", "When the last run started", [({}, round(report["started_at"]))])
+        write_atomic(path, "\n".join(lines) + "\n")
+
+
+def _rows_written(method, response):
+    if not isinstance(response, dict):
+        return 0
+    if method == "values.append":
+        return response.get("updates", {}).get("updatedRows", 0)
+    if method == "values.batchUpdate":
+        return response.get("totalUpdatedRows", 0)
+    if method == "values.update":
+        return response.get("updatedRows", 0)
+    return 0
+
+
+class _TracedRequest:
+    """Wraps a googleapiclient request so execute() is timed and counted"""
+
+    def __init__(self, request, method, body):
+        self._request = request
+        self._method = method
+        self._body = body
+
+    def execute(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = self._request.execute(*args, **kwargs)
+        except Exception as e:
+            # googleapiclient HttpError carries the HTTP response as .resp
+            if getattr(getattr(e, "resp", None), "status", None) == 429:
+                metrics.record_rate_limited("sheets", self._method)
+            metrics.record_call("sheets", self._method, time.perf_counter() - start, ok=False,
+                                bytes_sent=self._body)
+            raise
+        metrics.record_call("sheets", self._method, time.perf_counter() - start, bytes_sent=self._body,
+                            bytes_received=len(json.dumps(response)) if response is not None else 0,
+                            rows_written=_rows_written(self._method, response))
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self._request, name)
+
+
+class TracedSheetsService:
+    """Transparent proxy over a Sheets service (real or fake): every execute() is recorded
+    under its method path, e.g. "values.batchUpdate" or "spreadsheets.get"."""
+
+    def __init__(self, target, path=()):
+        self._target = target
+        self._path = path
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+        path = self._path + (name,)
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if hasattr(result, "execute"):
+                method = ".".join(path[1:] if len(path) > 2 else path)  # drop the spreadsheets() prefix
+                body = kwargs.get("body")
+                return _TracedRequest(result, method, len(json.dumps(body)) if body is not None else 0)
+            return TracedSheetsService(result, path)
+        return call
+
+
+metrics = RunMetrics()
+
+
+def write_reports(report_file=None, prometheus_file=None):
+    """Write the run report and/or Prometheus textfile (defaults from the environment)"""
+    atexit.unregister(write_reports)  # written explicitly; don't write again on exit
+    report_file = report_file or RUN_REPORT_FILE
+    prometheus_file = prometheus_file or PROMETHEUS_TEXTFILE
+    if report_file:
+        metrics.write_json(report_file)
+        print(f"📈 Run report written to {report_file}")
+    if prometheus_file:
+        metrics.write_prometheus(prometheus_file)
+
+
+if RUN_REPORT_FILE or PROMETHEUS_TEXTFILE:
+    atexit.register(write_reports)
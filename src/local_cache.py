@@ -0,0 +1,54 @@
+import os
+import json
+import threading
+
+# Local caches live in .cache/ in the project root (ignored by git) unless SLACK_SUMMARY_CACHE_DIR is set
+CACHE_DIR = os.getenv("SLACK_SUMMARY_CACHE_DIR") or os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.cache'))
+
+
+def cache_path(*parts):
+    return os.path.join(CACHE_DIR, *parts)
+
+
+def load_json(path, default=None):
+    """Parsed contents of a cache file, or `default` when it is missing or unreadable"""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def write_atomic(path, text):
+    """Write through a temp file and rename, so a crash never leaves a half-written file"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def save_json(path, data, indent=None):
+    write_atomic(path, json.dumps(data, indent=indent))
+
+
+class Shared:
+    """One instance per key (token, sheet ID) for the life of the process.
+
+    Instances are built under a lock, so parallel fetch workers asking at the same time
+    share one object (and one on-disk cache) instead of racing to build two.
+    """
+
+    def __init__(self):
+        self._instances = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, factory):
+        with self._lock:
+            if key not in self._instances:
+                self._instances[key] = factory()
+            return self._instances[key]
+
+    def clear(self):
+        with self._lock:
+            self._instances.clear()
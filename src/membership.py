@@ -0,0 +1,133 @@
+import time
+import threading
+from slack_api import api_get, paginate, SlackApiError
+from local_cache import cache_path, load_json, save_json, Shared
+
+MEMBERSHIP_CACHE_FILE = cache_path('membership.json')
+MEMBERSHIP_CACHE_TTL = 6 * 60 * 60  # seconds before users.conversations is swept again
+MEMBERSHIP_RETRY_AFTER = 5 * 60     # seconds before a failed sweep is tried again
+# Errors that mean the bot cannot read a channel until it is (re)invited
+NOT_READABLE_ERRORS = {"not_in_channel", "channel_not_found", "is_archived"}
+
+_memberships = Shared()
+
+
+class Membership:
+    """IDs of the channels the bot belongs to, from one paginated users.conversations sweep.
+
+    Cached on disk like the channel index. A channel missing from the cache triggers at
+    most one re-sweep per process, so a bot invited since the last sweep is picked up
+    without a conversations.info call per channel.
+
+    If the sweep fails (missing_scope, a transient error) every channel is treated as
+    readable until the retry is due, so fetch_history's own error path decides instead of
+    every pipeline silently skipping every channel.
+    """
+
+    def __init__(self, token, cache_file=MEMBERSHIP_CACHE_FILE, ttl=MEMBERSHIP_CACHE_TTL):
+        self.token = token
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.fetched_at = 0
+        self.member_ids = set()
+        self.failed_at = 0  # last failed sweep; 0 once a sweep succeeds
+        self._lock = threading.Lock()
+        self._refreshed = False
+        self._load()
+
+    def _load(self):
+        cached = load_json(self.cache_file, {})
+        self.fetched_at = cached.get("fetched_at", 0)
+        self.member_ids = set(cached.get("member_ids", []))
+
+    def _save(self):
+        save_json(self.cache_file, {"fetched_at": self.fetched_at, "member_ids": sorted(self.member_ids)})
+
+    def is_stale(self):
+        if self.failed_at:
+            return time.time() - self.failed_at > MEMBERSHIP_RETRY_AFTER
+        return time.time() - self.fetched_at > self.ttl
+
+    def refresh(self):
+        """Rebuild the member set from a users.conversations sweep (archived channels excluded)"""
+        params = {"types": "public_channel,private_channel", "exclude_archived": True}
+        self._refreshed = True
+        try:
+            member_ids = {ch["id"] for ch in paginate(self.token, "users.conversations", "channels", params)}
+        except SlackApiError as e:
+            self.failed_at = time.time()
+            print(f"⚠️ Could not list bot memberships ({e.data.get('error', e.data)}); treating channels as readable")
+            return False
+        self.member_ids = member_ids
+        self.fetched_at = time.time()
+        self.failed_at = 0
+        self._save()
+        print(f"🔄 Bot membership refreshed: member of {len(self.member_ids)} channels")
+        return True
+
+    def is_member(self, channel_id):
+        with self._lock:
+            if self.is_stale():
+                self.refresh()
+            if channel_id not in self.member_ids and not self._refreshed:
+                self.refresh()
+            return bool(self.failed_at) or channel_id in self.member_ids
+
+    def readable(self, channel_ids):
+        """The subset of `channel_ids` the bot can read, in order; at most one sweep for all of them"""
+        with self._lock:
+            if self.is_stale() or (not self._refreshed and not self.member_ids.issuperset(channel_ids)):
+                self.refresh()
+            if self.failed_at:
+                return list(channel_ids)
+            return [channel_id for channel_id in channel_ids if channel_id in self.member_ids]
+
+    def add(self, channel_id):
+        with self._lock:
+            self.member_ids.add(channel_id)
+            self._save()
+
+    def discard(self, channel_id):
+        """Forget a channel Slack says the bot can no longer read (removed, archived or deleted)"""
+        with self._lock:
+            if channel_id in self.member_ids:
+                self.member_ids.discard(channel_id)
+                self._save()
+
+    def join(self, channel_id):
+        """conversations.join a public channel; private channels need an invite and are reported"""
+        data = api_get(self.token, "conversations.join", {"channel": channel_id})
+        if not data.get("ok"):
+            print(f"⚠️ Could not join {channel_id}: {data.get('error', data)}")
+            return False
+        self.add(channel_id)
+        print(f"➕ Joined channel {channel_id} ({data.get('channel', {}).get('name', 'unknown')})")
+        return True
+
+
+def get_membership(token):
+    """The process-wide Membership for `token`"""
+    return _memberships.get(token, lambda: Membership(token))
+
+
+def preflight(token, channel_ids, auto_join=False):
+    """Split `channel_ids` into (readable, unreadable) before any history is fetched.
+
+    With auto_join, public channels the bot is not in are joined first; private ones (and
+    any the channel index cannot see) need an invite and are listed instead. Unreadable
+    channels are reported once here instead of failing mid-run in every fetch worker.
+    """
+    membership = get_membership(token)
+    readable = set(membership.readable(channel_ids))
+    missing = [channel_id for channel_id in channel_ids if channel_id not in readable]
+    if auto_join and missing:
+        from channel_index import get_channel_index
+        public = get_channel_index(token).public_ids(missing)
+        readable.update(channel_id for channel_id in missing if channel_id in public and membership.join(channel_id))
+        invite_needed = [channel_id for channel_id in missing if channel_id not in public]
+        if invite_needed:
+            print(f"✉️ Invite needed (private or not visible to the bot): {', '.join(invite_needed)}")
+    unreadable = [channel_id for channel_id in channel_ids if channel_id not in readable]
+    if unreadable:
+        print(f"⚠️ Bot is not a member of {len(unreadable)} channels, skipping: {', '.join(unreadable)}")
+    return [channel_id for channel_id in channel_ids if channel_id in readable], unreadable
@@ -0,0 +1,238 @@
+import os
+import json
+import sqlite3
+import threading
+
+# System of record for everything fetched from Slack; kept out of .cache so clearing caches never drops history
+MESSAGE_DB = os.getenv("SLACK_MESSAGE_DB") or os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..', 'data', 'slack_messages.db'))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    channel_id   TEXT NOT NULL,
+    ts           TEXT NOT NULL,
+    ts_num       REAL NOT NULL,
+    user         TEXT,
+    thread_ts    TEXT,
+    reply_count  INTEGER NOT NULL DEFAULT 0,
+    latest_reply TEXT,
+    subtype      TEXT,
+    text         TEXT,
+    raw          TEXT NOT NULL,
+    PRIMARY KEY (channel_id, ts)
+);
+CREATE INDEX IF NOT EXISTS idx_messages_channel_ts ON messages (channel_id, ts_num);
+CREATE INDEX IF NOT EXISTS idx_messages_ts ON messages (ts_num);
+CREATE INDEX IF NOT EXISTS idx_messages_user ON messages (user);
+CREATE INDEX IF NOT EXISTS idx_messages_thread ON messages (channel_id, thread_ts);
+"""
+
+# Activity counters kept up to date by triggers, so only newly inserted messages (and threads
+# gaining their first reply) ever touch them. Days and hours are local time, like summarizer days.
+ROLLUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollup_channel_day (
+    channel_id TEXT NOT NULL,
+    day        TEXT NOT NULL,
+    messages   INTEGER NOT NULL DEFAULT 0,
+    replies    INTEGER NOT NULL DEFAULT 0,
+    threads    INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (channel_id, day)
+);
+CREATE TABLE IF NOT EXISTS rollup_user_day (
+    user     TEXT NOT NULL,
+    day      TEXT NOT NULL,
+    messages INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user, day)
+);
+CREATE TABLE IF NOT EXISTS rollup_hour (
+    day      TEXT NOT NULL,
+    hour     INTEGER NOT NULL,
+    messages INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, hour)
+);
+CREATE TRIGGER IF NOT EXISTS rollup_on_insert AFTER INSERT ON messages BEGIN
+    INSERT INTO rollup_channel_day (channel_id, day, messages, replies, threads)
+    VALUES (NEW.channel_id, date(NEW.ts_num, 'unixepoch', 'localtime'), 1,
+            NEW.thread_ts IS NOT NULL AND NEW.thread_ts != NEW.ts, NEW.thread_ts IS NOT NULL AND NEW.thread_ts = NEW.ts)
+    ON CONFLICT (channel_id, day) DO UPDATE SET
+        messages = messages + 1, replies = replies + excluded.replies, threads = threads + excluded.threads;
+    INSERT INTO rollup_user_day (user, day, messages)
+    SELECT NEW.user, date(NEW.ts_num, 'unixepoch', 'localtime'), 1 WHERE NEW.user IS NOT NULL
+    ON CONFLICT (user, day) DO UPDATE SET messages = messages + 1;
+    INSERT INTO rollup_hour (day, hour, messages)
+    VALUES (date(NEW.ts_num, 'unixepoch', 'localtime'), CAST(strftime('%H', NEW.ts_num, 'unixepoch', 'localtime') AS INTEGER), 1)
+    ON CONFLICT (day, hour) DO UPDATE SET messages = messages + 1;
+END;
+-- A message stored before anyone replied only gets its thread_ts once the thread starts
+CREATE TRIGGER IF NOT EXISTS rollup_on_thread_start AFTER UPDATE OF thread_ts ON messages
+WHEN OLD.thread_ts IS NULL AND NEW.thread_ts = NEW.ts BEGIN
+    UPDATE rollup_channel_day SET threads = threads + 1
+    WHERE channel_id = NEW.channel_id AND day = date(NEW.ts_num, 'unixepoch', 'localtime');
+END;
+"""
+
+# Thread replies carry the parent's thread_ts; parents and plain messages do not differ from it
+TOP_LEVEL = "(thread_ts IS NULL OR thread_ts = ts)"
+
+_store = None
+_store_lock = threading.Lock()
+
+
+class MessageStore:
+    """SQLite store of raw Slack messages keyed on (channel ID, ts); safe to share across threads"""
+
+    def __init__(self, path=MESSAGE_DB):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        has_rollups = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'rollup_channel_day'").fetchone()
+        self._conn.executescript(ROLLUP_SCHEMA)
+        if not has_rollups:
+            # Databases created before the rollups existed are counted once; triggers take over from here
+            self.rebuild_rollups()
+
+    def add_messages(self, channel_id, messages):
+        """Insert or refresh messages (edits, new replies); returns how many were new"""
+        rows = [
+            (channel_id, m["ts"], float(m["ts"]), m.get("user"), m.get("thread_ts"),
+             m.get("reply_count", 0), m.get("latest_reply"), m.get("subtype"), m.get("text"), json.dumps(m))
+            for m in messages if m.get("ts")
+        ]
+        if not rows:
+            return 0
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO messages "
+                "(channel_id, ts, ts_num, user, thread_ts, reply_count, latest_reply, subtype, text, raw) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            inserted = self._conn.total_changes - before
+            self._conn.executemany(
+                "UPDATE messages SET user = ?, thread_ts = ?, reply_count = ?, latest_reply = ?, "
+                "subtype = ?, text = ?, raw = ? WHERE channel_id = ? AND ts = ? AND raw != ?",
+                [(r[3], r[4], r[5], r[6], r[7], r[8], r[9], r[0], r[1], r[9]) for r in rows])
+        return inserted
+
+    def rebuild_rollups(self):
+        """Recount every rollup from the stored messages (full scan; the triggers make this a one-off)"""
+        day = "date(ts_num, 'unixepoch', 'localtime')"
+        with self._lock, self._conn:
+            self._conn.executescript("DELETE FROM rollup_channel_day; DELETE FROM rollup_user_day; DELETE FROM rollup_hour;")
+            self._conn.execute(
+                f"INSERT INTO rollup_channel_day (channel_id, day, messages, replies, threads) "
+                f"SELECT channel_id, {day}, COUNT(*), SUM(NOT {TOP_LEVEL}), SUM(thread_ts IS NOT NULL AND thread_ts = ts) "
+                f"FROM messages GROUP BY channel_id, {day}")
+            self._conn.execute(
+                f"INSERT INTO rollup_user_day (user, day, messages) "
+                f"SELECT user, {day}, COUNT(*) FROM messages WHERE user IS NOT NULL GROUP BY user, {day}")
+            self._conn.execute(
+                f"INSERT INTO rollup_hour (day, hour, messages) "
+                f"SELECT {day}, CAST(strftime('%H', ts_num, 'unixepoch', 'localtime') AS INTEGER), COUNT(*) "
+                f"FROM messages GROUP BY 1, 2")
+
+    def rollups(self, since_day=None):
+        """Rollup rows for days >= since_day (YYYY-MM-DD): {"channel_day": [...], "user_day": [...], "hour": [...]}"""
+        tables = {
+            "channel_day": "SELECT channel_id, day, messages, replies, threads FROM rollup_channel_day",
+            "user_day": "SELECT user, day, messages FROM rollup_user_day",
+            "hour": "SELECT day, hour, messages FROM rollup_hour",
+        }
+        where = " WHERE day >= ?" if since_day else ""
+        params = [since_day] if since_day else []
+        with self._lock:
+            return {name: [dict(row) for row in self._conn.execute(sql + where + " ORDER BY day", params)]
+                    for name, sql in tables.items()}
+
+    def get_messages(self, channel_id=None, since=None, until=None, limit=None, newest_first=True,
+                     top_level_only=False):
+        """Messages as Slack returned them, filtered by channel and [since, until) epoch seconds"""
+        clauses, params = [], []
+        if top_level_only:
+            clauses.append(TOP_LEVEL)
+        if channel_id:
+            clauses.append("channel_id = ?")
+            params.append(channel_id)
+        if since is not None:
+            clauses.append("ts_num >= ?")
+            params.append(float(since))
+        if until is not None:
+            clauses.append("ts_num < ?")
+            params.append(float(until))
+        sql = "SELECT raw FROM messages"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY ts_num " + ("DESC" if newest_first else "ASC")
+        if limit:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        with self._lock:
+            return [json.loads(row["raw"]) for row in self._conn.execute(sql, params)]
+
+    def iter_messages(self, channel_id=None, since=None, until=None, chunk_size=1000, top_level_only=False):
+        """Yield (channel_id, message) oldest first in bounded chunks, for rebuilding large tabs"""
+        last = (float(since) if since is not None else float("-inf"), "", "")
+        while True:
+            clauses = ["(ts_num, channel_id, ts) > (?, ?, ?)"]
+            if top_level_only:
+                clauses.append(TOP_LEVEL)
+            params = list(last)
+            if channel_id:
+                clauses.append("channel_id = ?")
+                params.append(channel_id)
+            if until is not None:
+                clauses.append("ts_num < ?")
+                params.append(float(until))
+            sql = ("SELECT channel_id, ts, ts_num, raw FROM messages WHERE " + " AND ".join(clauses) +
+                   " ORDER BY ts_num, channel_id, ts LIMIT ?")
+            with self._lock:
+                rows = self._conn.execute(sql, params + [chunk_size]).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield row["channel_id"], json.loads(row["raw"])
+            last = (rows[-1]["ts_num"], rows[-1]["channel_id"], rows[-1]["ts"])
+
+    def get_thread(self, channel_id, thread_ts):
+        """Stored replies to one thread (parent excluded), oldest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT raw FROM messages WHERE channel_id = ? AND thread_ts = ? AND ts != ? ORDER BY ts_num",
+                (channel_id, thread_ts, thread_ts)).fetchall()
+        return [json.loads(row["raw"]) for row in rows]
+
+    def latest_ts(self, channel_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT ts FROM messages WHERE channel_id = ? ORDER BY ts_num DESC LIMIT 1", (channel_id,)).fetchone()
+        return row["ts"] if row else None
+
+    def channel_ids(self):
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT DISTINCT channel_id FROM messages ORDER BY channel_id")]
+
+    def count(self, channel_id=None):
+        with self._lock:
+            if channel_id:
+                return self._conn.execute("SELECT COUNT(*) FROM messages WHERE channel_id = ?", (channel_id,)).fetchone()[0]
+            return self._conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def get_message_store():
+    """Shared MessageStore for the process"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = MessageStore()
+        return _store
@@ -0,0 +1,80 @@
+import re
+
+# Every piece of Slack markup we render, in one pass:
+#   <@U123>, <@U123|name>        user mentions
+#   <#C123>, <#C123|name>        channel references
+#   <!subteam^S123|@team>        user group mentions
+#   <!here>, <!date^...|text>    special mentions and dates
+#   <https://x>, <https://x|y>   links
+#   :emoji_name:                 emoji shortcodes
+#   &amp; &lt; &gt;             Slack's escaped control characters
+TOKEN_PATTERN = re.compile(
+    r"<(?P<sigil>[@#!]?)(?P<target>[^|>]*)(?:\|(?P<label>[^>]*))?>"
+    r"|:(?P<emoji>[a-z0-9_+'-]+):"
+    r"|&(?P<entity>amp|lt|gt);"
+)
+ENTITIES = {"amp": "&", "lt": "<", "gt": ">"}
+# Common shortcodes; anything else is left as :name:
+EMOJI = {
+    "+1": "👍", "thumbsup": "👍", "-1": "👎", "thumbsdown": "👎", "white_check_mark": "✅",
+    "heavy_check_mark": "✔️", "x": "❌", "warning": "⚠️", "eyes": "👀", "tada": "🎉", "rocket": "🚀",
+    "fire": "🔥", "pray": "🙏", "raised_hands": "🙌", "clap": "👏", "wave": "👋", "100": "💯",
+    "smile": "😄", "slightly_smiling_face": "🙂", "grinning": "😀", "joy": "😂", "sweat_smile": "😅",
+    "thinking_face": "🤔", "heart": "❤️", "bug": "🐛", "memo": "📝", "calendar": "📆", "pushpin": "📌",
+    "point_up": "☝️", "point_right": "👉", "red_circle": "🔴", "large_green_circle": "🟢",
+    "hourglass_flowing_sand": "⏳", "construction": "🚧", "bulb": "💡", "ok_hand": "👌", "sob": "😭",
+}
+SPECIAL_MENTIONS = {"here", "channel", "everyone"}
+
+
+class MrkdwnRenderer:
+    """Renders Slack mrkdwn message text as plain text for the sheet.
+
+    Lookups are plain dicts (user ID -> display name, channel ID -> name, user group
+    ID -> handle) so one renderer can be built per run and reused for every message.
+    Known users render as their display name, unknown ones as @ID.
+    """
+
+    def __init__(self, users=None, channels=None, usergroups=None, emoji=EMOJI):
+        self.users = users or {}
+        self.channels = channels or {}
+        self.usergroups = usergroups or {}
+        self.emoji = emoji or {}
+        # Bound once so render() does not build a new callable per message
+        self._replace = self._replace_token
+        self._sub = TOKEN_PATTERN.sub
+
+    def _replace_token(self, match):
+        sigil, target, label, name, entity = match.groups()
+        if sigil == "@":
+            return self.users.get(target) or label or f"@{target}"
+        if target is not None:
+            if sigil == "#":
+                return f"#{label or self.channels.get(target, target)}"
+            if sigil == "!":
+                if target.startswith("subteam^"):
+                    return label or self.usergroups.get(target[8:], f"@{target[8:]}")
+                if target in SPECIAL_MENTIONS:
+                    return f"@{target}"
+                return label or target
+            # Links: keep the URL next to its label, since the sheet has no hyperlinks
+            if label and label != target and label != target.split(":", 1)[-1]:
+                return f"{label} ({target})"
+            return label or target
+        if name is not None:
+            return self.emoji.get(name, match.group(0))
+        return ENTITIES[entity]
+
+    def render(self, text):
+        if not text:
+            return ""
+        # Most messages have no markup at all
+        if "<" not in text and ":" not in text and "&" not in text:
+            return text
+        return self._sub(self._replace, text)
+
+    def render_many(self, texts):
+        """Render a batch of texts in one call (e.g. a whole channel history)"""
+        render = self.render
+        return [render(text) for text in texts]
+
@@ -1,8 +1,16 @@
 import os
 from datetime import datetime
 from dotenv import load_dotenv
-import requests
-from google_sheets_real import GoogleSheetsClient
+from google_sheets_real import get_sheets_client
+from user_directory import get_user_directory
+from sync_state import SyncState
+from channel_fetcher import fetch_history, iter_channels_history, MAX_WORKERS
+from sheets_writer import SheetsWriter
+from row_index import RowIndex, message_key
+from message_store import get_message_store
+from thread_expander import expand_threads, is_thread_parent
+from mrkdwn import MrkdwnRenderer
+from channel_index import get_channel_index
 
 # Load .env from project root
 env_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.env'))
@@ -10,119 +18,204 @@ load_dotenv(env_path)
 
 SLACK_BOT_TOKEN = os.getenv("SLACK_BOT_TOKEN")
 SHEET_ID = os.getenv("GOOGLE_SHEET_ID")
+TAB_NAME = "project summary"
+# Slack workspace (team) ID used in the channel link column
+WORKSPACE_ID = os.getenv("SLACK_WORKSPACE_ID", "T2AAHSB5F")
+# Timestamp, message, runtime, channel link, message key
+ROW_WIDTH = 5
 
 
 def get_last_n_messages(channel_id, n=3):
-    url = "https://slack.com/api/conversations.history"
-    headers = {"Authorization": f"Bearer {SLACK_BOT_TOKEN}"}
-    params = {"channel": channel_id, "limit": n}
-    resp = requests.get(url, headers=headers, params=params)
-    data = resp.json()
-    if not data.get("ok") or not data.get("messages"):
+    messages = fetch_history(SLACK_BOT_TOKEN, channel_id, limit=n)
+    if not messages:
         print(f"No messages found or error fetching messages for channel {channel_id}.")
         return []
-    return data["messages"]
+    return messages
+
+def get_new_messages(channel_id, oldest):
+    """Fetch every message posted after `oldest` (exclusive), newest first like conversations.history"""
+    return fetch_history(SLACK_BOT_TOKEN, channel_id, oldest=oldest)
 
 def get_user_map():
-    """Fetch user ID to display name mapping from Slack API."""
-    url = "https://slack.com/api/users.list"
-    headers = {"Authorization": f"Bearer {SLACK_BOT_TOKEN}"}
-    resp = requests.get(url, headers=headers)
-    data = resp.json()
-    user_map = {}
-    if data.get("ok"):
-        for user in data.get("members", []):
-            user_id = user.get("id")
-            # Prefer display_name, fallback to real_name, then name
-            profile = user.get("profile", {})
-            display_name = profile.get("display_name") or profile.get("real_name") or user.get("name")
-            user_map[user_id] = display_name
-    return user_map
-
-def push_channel_summary_to_sheet(channel_id, channel_name="(unknown)"):
-    messages = get_last_n_messages(channel_id, n=5)
-    print(f"Fetched {len(messages)} messages from channel {channel_id} ({channel_name})")
-    if not messages:
-        print("No messages to push.")
-        return
-    import re
-    from datetime import datetime as dtmod
-    user_map = get_user_map()
+    """User ID to display name mapping from the cached workspace user directory."""
+    return get_user_directory(SLACK_BOT_TOKEN).user_map()
+
+def get_renderer(user_map):
+    """mrkdwn renderer resolving <@U…> from the user map and <#C…> from the cached channel index"""
+    return MrkdwnRenderer(users=user_map, channels=get_channel_index(SLACK_BOT_TOKEN).names_by_id())
+
+def build_channel_rows(channel_id, messages, user_map, runtime_ts, renderer=None):
+    """Turn one channel's messages (newest first, as Slack returns them) into keyed sheet rows.
+
+    Thread replies attached by thread_expander are listed under their parent in the same cell.
+    """
+    renderer = renderer or get_renderer(user_map)
     rows = []
-    mention_pattern = re.compile(r"<@([A-Z0-9]+)>")
-    runtime_ts = dtmod.now().strftime("%Y-%m-%d %H:%M:%S")
-    channel_link = f"https://app.slack.com/client/T2AAHSB5F/{channel_id}"
+    channel_link = f"https://app.slack.com/client/{WORKSPACE_ID}/{channel_id}"
+    def format_message(msg):
+        user_id = msg.get("user", "bot/system")
+        return f"{user_map.get(user_id, user_id)}: {renderer.render(msg.get('text', ''))}"
     for msg in reversed(messages):  # Oldest first
         ts = float(msg.get("ts", 0))
         dt = datetime.fromtimestamp(ts)
-        user_id = msg.get("user", "bot/system")
-        text = msg.get("text", "")
-        # Replace user mentions in text with display names
-        def replace_mention(match):
-            uid = match.group(1)
-            return user_map.get(uid, f"@{uid}")
-        text_clean = mention_pattern.sub(replace_mention, text)
-        # Resolve user name
-        user_name = user_map.get(user_id, user_id)
         # Pretty print columns
         col1 = dt.strftime("%Y-%m-%d %H:%M:%S")
-        col2 = f"{user_name}: {text_clean}"
+        col2 = "\n".join([format_message(msg)] + [f"  ↳ {format_message(r)}" for r in msg.get("replies", [])])
         col3 = runtime_ts
         col4 = channel_link
-        rows.append([col1, col2, col3, col4])
+        col5 = message_key(channel_id, msg.get("ts"))
+        rows.append([col1, col2, col3, col4, col5])
+    return rows
+
+def legacy_row_key(row):
+    """Rows written before the message-key column are matched on timestamp + channel link"""
+    return (row[0], row[3] if len(row) > 3 else "")
+
+def push_channels_summary_to_sheet(channels, incremental=False, max_workers=MAX_WORKERS, tab_name=TAB_NAME):
+    """Fetch many channels concurrently and upsert all their rows into the project summary tab.
+
+    `channels` is a list of (channel_id, channel_name). Rows are keyed on channel ID + Slack ts
+    through a local row index, so the tab is not re-read unless the index has drifted. Each
+    channel's rows go to a background SheetsWriter as soon as it is fetched, so Sheets writes
+    overlap the remaining Slack fetches. With incremental=True a channel that already has a
+    stored high-water mark only contributes messages newer than it.
+    """
+    sync_state = SyncState(tab_name) if incremental else None
+    oldest = {}
+    if incremental:
+        for channel_id, _ in channels:
+            cursor = sync_state.get_cursor(channel_id)
+            if cursor:
+                oldest[channel_id] = cursor
+    names = dict(channels)
+    user_map = get_user_map()
+    renderer = get_renderer(user_map)
+    runtime_ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    client = get_sheets_client()
+    client.test_connection(SHEET_ID)
+    row_index = RowIndex(SHEET_ID, tab_name, ROW_WIDTH, legacy_key=legacy_row_key)
+    fetched, fetched_threads, cached_threads = {}, 0, 0
+    with SheetsWriter(client, SHEET_ID, row_index) as writer:
+        # Channels without a cursor are seeded from their latest few messages; thread replies
+        # are attached on the fetch workers
+        for channel_id, messages, threads in iter_channels_history(
+                SLACK_BOT_TOKEN, list(names), limit=5, oldest=oldest, max_workers=max_workers,
+                prepare=lambda channel_id, messages: expand_threads(SLACK_BOT_TOKEN, {channel_id: messages})):
+            if messages is None:
+                continue
+            print(f"Fetched {len(messages)} messages from channel {channel_id} ({names[channel_id]})")
+            if not messages:
+                continue
+            new_threads, unchanged_threads = threads
+            fetched_threads += new_threads
+            cached_threads += unchanged_threads
+            for row in build_channel_rows(channel_id, messages, user_map, runtime_ts, renderer):
+                writer.put(row[-1], row)
+            fetched[channel_id] = messages
+    if not fetched:
+        print("No messages to push.")
+        return True
+    print(f"Expanded {fetched_threads + cached_threads} threads ({cached_threads} unchanged since the last run)")
+    if writer.pending():
+        print("❌ Some writes failed, see errors above.")
+        return False
+    if sync_state is not None:
+        # Only advance cursors once the rows are safely in the sheet
+        for channel_id, messages in fetched.items():
+            sync_state.advance(channel_id, max(messages, key=lambda m: float(m.get("ts", 0)))["ts"])
+        sync_state.save()
+    print(f"✅ Wrote/updated {writer.written} messages from {len(fetched)} channels to '{tab_name}' tab "
+          f"({writer.coalesced} repeat updates coalesced).")
+    return True
+
+def write_messages_to_sheet(messages_by_channel, sync_state=None, row_index=None, tab_name=TAB_NAME):
+    """Upsert {channel_id: messages} into the project summary tab in one flush.
+
+    If `sync_state` is given, each channel's high-water mark is advanced once the rows
+    are safely written. Long-running callers can pass their own `row_index` to keep it
+    in memory between batches. Returns True on success.
+    """
+    user_map = get_user_map()
+    renderer = get_renderer(user_map)
+    runtime_ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    rows = []
+    for channel_id, messages in messages_by_channel.items():
+        rows.extend(build_channel_rows(channel_id, messages, user_map, runtime_ts, renderer))
     print("Rows to write/update:")
     for r in rows:
         print(r)
 
-    client = GoogleSheetsClient()
+    client = get_sheets_client()
     client.test_connection(SHEET_ID)
-    tab_name = 'project summary'
-    range_name = f"{tab_name}!A:D"
-    # Fetch existing sheet data
-    try:
-        existing = client.service.spreadsheets().values().get(
-            spreadsheetId=SHEET_ID,
-            range=range_name
-        ).execute().get('values', [])
-    except Exception as e:
-        print(f"Warning: Could not fetch existing sheet data: {e}")
-        existing = []
-
-    # Build a map of date/time to row index
-    existing_map = {row[0]: idx for idx, row in enumerate(existing) if row}
-    updated = 0
-    # Overwrite rows with matching date/time, else append
-    for row in rows:
-        date_time = row[0]
-        if date_time in existing_map:
-            # Overwrite this row
-            row_idx = existing_map[date_time] + 1  # 1-based for Sheets API
-            update_range = f"{tab_name}!A{row_idx}:D{row_idx}"
-            try:
-                print(f"Updating row {row_idx} with: {row}")
-                resp = client.service.spreadsheets().values().update(
-                    spreadsheetId=SHEET_ID,
-                    range=update_range,
-                    valueInputOption='RAW',
-                    body={'values': [row]}
-                ).execute()
-                print(f"Update response: {resp}")
-                updated += 1
-            except Exception as e:
-                print(f"❌ Failed to update row {row_idx}: {e}")
-        else:
-            # Append as new row
-            try:
-                print(f"Appending new row: {row}")
-                resp = client.service.spreadsheets().values().append(
-                    spreadsheetId=SHEET_ID,
-                    range=range_name,
-                    valueInputOption='RAW',
-                    insertDataOption='INSERT_ROWS',
-                    body={'values': [row]}
-                ).execute()
-                print(f"Append response: {resp}")
-                updated += 1
-            except Exception as e:
-                print(f"❌ Failed to append new row: {e}")
-    print(f"✅ Wrote/updated {updated} messages from '{channel_name}' to '{tab_name}' tab.")
+    row_index = row_index or RowIndex(SHEET_ID, tab_name, ROW_WIDTH, legacy_key=legacy_row_key)
+    updated = row_index.upsert(client, rows)
+    ok = client.flush()
+    row_index.record_appends(client)
+    if not ok:
+        print("❌ Some writes failed, see errors above.")
+        return False
+    if sync_state is not None:
+        # Only advance cursors once the rows are safely in the sheet
+        for channel_id, messages in messages_by_channel.items():
+            sync_state.advance(channel_id, max(messages, key=lambda m: float(m.get("ts", 0)))["ts"])
+        sync_state.save()
+    print(f"✅ Wrote/updated {updated} messages from {len(messages_by_channel)} channels to '{row_index.tab_name}' tab.")
+    return True
+
+def push_stored_messages_to_sheet(channel_ids=None, since=None, chunk_size=1000, tab_name=TAB_NAME):
+    """Rebuild the project summary tab from the local message store without calling Slack.
+
+    Messages are streamed oldest first in chunks of `chunk_size`, each upserted in one flush,
+    so rebuilding a long history never holds it all in memory. `since` is epoch seconds.
+    """
+    store = get_message_store()
+    channel_ids = channel_ids or store.channel_ids()
+    row_index = RowIndex(SHEET_ID, tab_name, ROW_WIDTH, legacy_key=legacy_row_key)
+    total = 0
+    for channel_id in channel_ids:
+        chunk = []
+        for _, msg in store.iter_messages(channel_id, since=since, chunk_size=chunk_size,
+                                             top_level_only=True):
+            if is_thread_parent(msg):
+                msg["replies"] = store.get_thread(channel_id, msg["ts"])
+            chunk.append(msg)
+            if len(chunk) >= chunk_size:
+                # newest first, like conversations.history
+                if not write_messages_to_sheet({channel_id: chunk[::-1]}, row_index=row_index):
+                    return False
+                total += len(chunk)
+                chunk = []
+        if chunk:
+            if not write_messages_to_sheet({channel_id: chunk[::-1]}, row_index=row_index):
+                return False
+            total += len(chunk)
+    print(f"✅ Rebuilt {total} stored messages from {len(channel_ids)} channels into '{tab_name}' tab.")
+    return True
+
+def push_channel_summary_to_sheet(channel_id, channel_name="(unknown)", incremental=False):
+    """Write recent messages from a single channel to the project summary tab."""
+    return push_channels_summary_to_sheet([(channel_id, channel_name)], incremental=incremental)
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Push recent Slack messages to the project summary tab")
+    parser.add_argument("channels", nargs="*", metavar="CHANNEL_ID[:NAME]",
+                        help="Slack channel IDs, optionally with a display name, e.g. C07QR3DV82K:integration_testing")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only fetch and append messages newer than the last run")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS,
+                        help="Number of channels fetched concurrently")
+    parser.add_argument("--from-store", action="store_true",
+                        help="Rebuild the tab from the local message store instead of calling Slack "
+                             "(all stored channels if none are given)")
+    parser.add_argument("--since", help="With --from-store, only messages on or after this date (YYYY-MM-DD)")
+    args = parser.parse_args()
+    channels = [tuple(c.split(":", 1)) if ":" in c else (c, "(unknown)") for c in args.channels]
+    if args.from_store:
+        since = datetime.strptime(args.since, "%Y-%m-%d").timestamp() if args.since else None
+        push_stored_messages_to_sheet([channel_id for channel_id, _ in channels], since=since)
+    elif not channels:
+        parser.error("at least one CHANNEL_ID is required unless --from-store is given")
+    else:
+        push_channels_summary_to_sheet(channels, incremental=args.incremental, max_workers=args.workers)
@@ -1,33 +1,183 @@
-import time
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-
-# --- CONFIG ---
-SLACK_URL = "https://app.slack.com/client/T2AAHSB5F"
-
-# --- SETUP SELENIUM ---
-chrome_options = Options()
-chrome_options.add_argument('--no-sandbox')
-chrome_options.add_argument('--disable-dev-shm-usage')
-chrome_options.add_argument('--disable-gpu')
-chrome_options.add_argument('--window-size=1920,1080')
-chrome_options.add_argument('--user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/137.0.0.0 Safari/537.36')
-# chrome_options.add_argument('--headless')  # Uncomment for headless mode
-
-service = Service(ChromeDriverManager().install())
-driver = webdriver.Chrome(service=service, options=chrome_options)
-driver.implicitly_wait(10)
-
-print(f"Navigating to: {SLACK_URL}")
-driver.get(SLACK_URL)
-time.sleep(10)  # Wait for JS to load
-
-page_text = driver.find_element('tag name', 'body').text
-print("\n--- PAGE TEXT START ---\n")
-print(page_text[:2000])  # Print first 2000 chars for inspection
-print("\n--- PAGE TEXT END ---\n")
-
-driver.quit()
-print("Done.")
+import os
+import re
+import sys
+import argparse
+from datetime import datetime
+from dotenv import load_dotenv
+
+# Load .env from project root
+env_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.env'))
+load_dotenv(env_path)
+
+SLACK_BOT_TOKEN = os.getenv("SLACK_BOT_TOKEN")
+SHEET_ID = os.getenv("GOOGLE_SHEET_ID")
+# Channel the recaps are posted or forwarded to, read through the Web API
+RECAP_CHANNEL_ID = os.getenv("SLACK_RECAP_CHANNEL_ID")
+RECAP_MESSAGES = 20  # recent messages searched for a recap
+TAB_NAME = "daily recap"
+# Date, time, active channels, total channels, activity rate, recap date, delivered with love, notes, recap key
+ROW_WIDTH = 9
+
+# "8 of your 10 recap channels had activity on Tuesday, June 10" / "8 of 10 channels active on ..."
+CHANNELS_PATTERN = re.compile(r"\b(\d+)\s+of\s+(?:your\s+)?(\d+)\s+(?:recap\s+)?channels?\b", re.IGNORECASE)
+DATE_PATTERN = re.compile(r"\b(?:on\s+)?((?:Mon|Tues|Wednes|Thurs|Fri|Satur|Sun)day,\s+"
+                          r"(?:January|February|March|April|May|June|July|August|September|October|November|December)"
+                          r"\s+\d{1,2})\b")
+DELIVERED_PATTERN = re.compile(r"delivered\s+with\s+love", re.IGNORECASE)
+
+
+def recap_day(recap_date, extracted_at):
+    """'Tuesday, June 10' -> 'YYYY-MM-DD', taking the latest such date not after extraction.
+
+    The year is part of the parse, so February 29 resolves to the latest leap year.
+    """
+    month_day = recap_date.split(", ", 1)[1] if ", " in recap_date else None
+    if not month_day:
+        return None
+    for year in range(extracted_at.year, extracted_at.year - 5, -1):
+        try:
+            day = datetime.strptime(f"{month_day} {year}", "%B %d %Y")
+        except ValueError:
+            continue
+        if day.date() <= extracted_at.date():
+            return day.strftime("%Y-%m-%d")
+    return None
+
+
+def parse_recap_text(text, extracted_at=None):
+    """Recap fields from plain text, or None when the text holds no "X of your Y recap channels" line"""
+    match = CHANNELS_PATTERN.search(text)
+    if not match:
+        return None
+    extracted_at = extracted_at or datetime.now()
+    active, total = int(match.group(1)), int(match.group(2))
+    # The recap date follows the channel count; fall back to anywhere in the text
+    date_match = DATE_PATTERN.search(text, match.end()) or DATE_PATTERN.search(text)
+    recap_date = date_match.group(1) if date_match else None
+    return {
+        "active_channels": active,
+        "total_channels": total,
+        "activity_rate": round(active / total * 100, 1) if total else 0.0,
+        "recap_date": recap_date,
+        "recap_day": recap_day(recap_date, extracted_at) if recap_date else None,
+        "delivered_with_love": bool(DELIVERED_PATTERN.search(text)),
+        "extracted_at": extracted_at,
+    }
+
+
+def html_to_text(html):
+    """Visible text of a saved Slack page"""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(["script", "style", "noscript", "svg"]):
+        tag.decompose()
+    return " ".join(soup.get_text(" ").split())
+
+
+def extract_from_html(html, extracted_at=None):
+    return parse_recap_text(html_to_text(html), extracted_at)
+
+
+def message_text(msg):
+    """A message's text plus the text of its blocks and attachments, where recap content usually lives"""
+    parts = [msg.get("text", "")]
+
+    def walk(node):
+        if isinstance(node, dict):
+            text = node.get("text")
+            if isinstance(text, str):
+                parts.append(text)
+            for value in node.values():
+                if isinstance(value, (dict, list)):
+                    walk(value)
+        elif isinstance(node, list):
+            for item in node:
+                walk(item)
+
+    walk(msg.get("blocks", []))
+    walk(msg.get("attachments", []))
+    return " ".join(" ".join(parts).split())
+
+
+def extract_from_channel(token, channel_id, limit=RECAP_MESSAGES):
+    """Recaps found in a channel's latest messages via conversations.history, newest first"""
+    from channel_fetcher import fetch_history
+    messages = fetch_history(token, channel_id, limit=limit) or []
+    recaps = []
+    for msg in messages:
+        recap = parse_recap_text(message_text(msg), datetime.fromtimestamp(float(msg.get("ts", 0))))
+        if recap:
+            recaps.append(recap)
+    return recaps
+
+
+def recap_row(recap):
+    extracted_at = recap["extracted_at"]
+    return [
+        extracted_at.strftime("%Y-%m-%d"),
+        extracted_at.strftime("%H:%M:%S"),
+        recap["active_channels"],
+        recap["total_channels"],
+        f"{recap['activity_rate']}%",
+        recap["recap_date"] or "",
+        "✅" if recap["delivered_with_love"] else "❌",
+        f"Extracted {extracted_at.strftime('%Y-%m-%d %H:%M:%S')} by quick_recap_extraction",
+        f"recap:{recap['recap_day'] or extracted_at.strftime('%Y-%m-%d')}",
+    ]
+
+
+def write_recaps(recaps, tab_name=TAB_NAME):
+    """Upsert one row per recap day, so re-extracting the same recap updates its row"""
+    from google_sheets_real import get_sheets_client
+    from row_index import RowIndex
+    client = get_sheets_client()
+    client.test_connection(SHEET_ID)
+    row_index = RowIndex(SHEET_ID, tab_name, ROW_WIDTH)
+    rows = {}
+    for recap in recaps:
+        row = recap_row(recap)
+        rows.setdefault(row[-1], row)  # recaps come newest first; keep the latest per day
+    row_index.upsert(client, list(rows.values()))
+    if not client.flush():
+        return False
+    row_index.record_appends(client)
+    print(f"✅ Wrote {len(rows)} recaps to '{tab_name}' tab.")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract Slack recap stats without a browser")
+    parser.add_argument("--html", nargs="*", help="Saved Slack pages to parse instead of reading the Web API")
+    parser.add_argument("--channel", default=RECAP_CHANNEL_ID,
+                        help="Channel the recaps are posted to (default: $SLACK_RECAP_CHANNEL_ID)")
+    parser.add_argument("--limit", type=int, default=RECAP_MESSAGES, help="Recent messages to search")
+    parser.add_argument("--write", action="store_true", help=f"Upsert the recaps into the '{TAB_NAME}' tab")
+    args = parser.parse_args()
+
+    if args.html:
+        recaps = []
+        for path in args.html:
+            with open(path, encoding="utf-8") as f:
+                recap = extract_from_html(f.read(), datetime.fromtimestamp(os.path.getmtime(path)))
+            if recap:
+                recaps.append(recap)
+            else:
+                print(f"⚠️ No recap found in {path}")
+    elif args.channel and SLACK_BOT_TOKEN:
+        recaps = extract_from_channel(SLACK_BOT_TOKEN, args.channel, args.limit)
+    else:
+        print("Error: pass --html files, or set SLACK_BOT_TOKEN and --channel / SLACK_RECAP_CHANNEL_ID.")
+        return 1
+
+    for recap in recaps:
+        print(f"📊 {recap['active_channels']} of {recap['total_channels']} channels active "
+              f"({recap['activity_rate']}%) on {recap['recap_date'] or 'unknown date'}; "
+              f"delivered with love: {'Yes' if recap['delivered_with_love'] else 'No'}")
+    if not recaps:
+        print("No recap content found.")
+        return 1
+    return 0 if not args.write or write_recaps(recaps) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+import os
+import sys
+import argparse
+from collections import defaultdict
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+
+from message_store import get_message_store
+from local_cache import cache_path, load_json, save_json
+
+# Load .env from project root
+env_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.env'))
+load_dotenv(env_path)
+
+SLACK_BOT_TOKEN = os.getenv("SLACK_BOT_TOKEN")
+SHEET_ID = os.getenv("GOOGLE_SHEET_ID")
+# Rows written last time per sheet/tab, so a shorter table blanks the leftovers in the same write
+ROLLUP_STATE_FILE = cache_path('rollups.json')
+TAB_NAME = "activity rollups"
+DEFAULT_DAYS = 14
+HEADER = ["Scope", "Name", "Day", "Messages", "Thread replies", "Threads", "Active channels", "Activity rate"]
+
+
+def rollup_rows(rollups, channel_names=None, user_map=None, total_channels=None):
+    """Sheet rows from MessageStore.rollups(): one workspace row per day (active channels and
+    activity rate), then per channel/day, per user/day and per hour-of-day rows"""
+    channel_names = channel_names or {}
+    user_map = user_map or {}
+    days = defaultdict(lambda: {"messages": 0, "replies": 0, "threads": 0, "channels": 0})
+    for row in rollups["channel_day"]:
+        day = days[row["day"]]
+        day["messages"] += row["messages"]
+        day["replies"] += row["replies"]
+        day["threads"] += row["threads"]
+        day["channels"] += 1
+    total_channels = total_channels or len({row["channel_id"] for row in rollups["channel_day"]})
+    rows = [HEADER]
+    for day, totals in sorted(days.items(), reverse=True):
+        rate = f"{totals['channels'] / total_channels * 100:.1f}%" if total_channels else ""
+        rows.append(["workspace", "all channels", day, totals["messages"], totals["replies"], totals["threads"],
+                     f"{totals['channels']} of {total_channels}", rate])
+    for row in sorted(rollups["channel_day"], key=lambda r: (r["day"], r["messages"]), reverse=True):
+        rows.append(["channel", f"#{channel_names.get(row['channel_id'], row['channel_id'])}", row["day"],
+                     row["messages"], row["replies"], row["threads"], "", ""])
+    for row in sorted(rollups["user_day"], key=lambda r: (r["day"], r["messages"]), reverse=True):
+        rows.append(["user", user_map.get(row["user"], row["user"]), row["day"], row["messages"], "", "", "", ""])
+    hours = defaultdict(int)
+    for row in rollups["hour"]:
+        hours[row["hour"]] += row["messages"]
+    for hour in range(24):
+        rows.append(["hour", f"{hour:02d}:00", "all days", hours[hour], "", "", "", ""])
+    return rows
+
+
+def ensure_tab(client, sheet_id, tab_name):
+    """Add the rollup tab on first use; test_connection's metadata says whether it exists"""
+    client.test_connection(sheet_id)
+    metadata = client.metadata.get(sheet_id) or {}
+    if tab_name in [sheet["properties"]["title"] for sheet in metadata.get("sheets", [])]:
+        return
+    client.service.spreadsheets().batchUpdate(
+        spreadsheetId=sheet_id,
+        body={"requests": [{"addSheet": {"properties": {"title": tab_name}}}]}
+    ).execute()
+    # The layout changed; keep the cached metadata (and with it the anchor fingerprint) current
+    client.metadata[sheet_id] = client.service.spreadsheets().get(spreadsheetId=sheet_id).execute()
+    print(f"➕ Added '{tab_name}' tab")
+
+
+def write_rollups(days=DEFAULT_DAYS, channel_names=None, user_map=None, total_channels=None, tab_name=TAB_NAME):
+    """Write the last `days` days of rollups to their tab in one batched write.
+
+    Counters are maintained by the message store as messages are ingested, so this only
+    reads the rollup tables for the window: the cost does not grow with stored history.
+    Rows left over from a longer previous table are blanked in the same write.
+    """
+    from google_sheets_real import get_sheets_client
+    since_day = (datetime.now() - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+    rows = rollup_rows(get_message_store().rollups(since_day), channel_names, user_map, total_channels)
+    client = get_sheets_client()
+    ensure_tab(client, SHEET_ID, tab_name)
+    state = load_json(ROLLUP_STATE_FILE, {})
+    key = f"{SHEET_ID}:{tab_name}"
+    padded = rows + [[""] * len(HEADER) for _ in range(state.get(key, 0) - len(rows))]
+    client.queue_write(SHEET_ID, f"'{tab_name}'!A1:H{len(padded)}", padded)
+    if not client.flush():
+        return False
+    state[key] = len(rows)
+    save_json(ROLLUP_STATE_FILE, state)
+    print(f"✅ Wrote {len(rows) - 1} rollup rows for the last {days} days to '{tab_name}' tab.")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write per-channel, per-user and per-hour activity counts to a tab")
+    parser.add_argument("--days", type=int, default=DEFAULT_DAYS, help="Days of activity to include")
+    parser.add_argument("--rebuild", action="store_true", help="Recount every rollup from the stored messages first")
+    parser.add_argument("--dry-run", action="store_true", help="Print the rows instead of writing them")
+    args = parser.parse_args()
+
+    store = get_message_store()
+    if args.rebuild:
+        store.rebuild_rollups()
+    channel_names, user_map, total_channels = {}, {}, None
+    if SLACK_BOT_TOKEN:
+        from user_directory import get_user_directory
+        from channel_index import get_channel_index
+        user_map = get_user_directory(SLACK_BOT_TOKEN).user_map()
+        index = get_channel_index(SLACK_BOT_TOKEN)
+        channel_names = index.names_by_id()
+        total_channels = len([entry for _, entry in index.active_channels() if entry["is_member"]]) or None
+    if args.dry_run:
+        since_day = (datetime.now() - timedelta(days=args.days - 1)).strftime("%Y-%m-%d")
+        for row in rollup_rows(store.rollups(since_day), channel_names, user_map, total_channels):
+            print(" | ".join(str(cell) for cell in row))
+        return 0
+    return 0 if write_rollups(args.days, channel_names, user_map, total_channels) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
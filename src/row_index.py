@@ -0,0 +1,131 @@
+import os
+import re
+from local_cache import cache_path, load_json, save_json
+
+ROW_INDEX_DIR = cache_path('row_index')
+
+# Start row of an A1 range such as "'project summary'!A120:E124"
+_RANGE_START_ROW = re.compile(r"![A-Z]+(\d+)")
+
+
+def message_key(channel_id, ts):
+    """Stable sheet key for a Slack message: unique even when two messages share a second"""
+    return f"{channel_id}:{ts}"
+
+
+class RowIndex:
+    """Message key -> sheet row number for one tab, persisted locally.
+
+    Rows carry their key in the last column. The local index is trusted until a
+    cheap spot check of the rows about to be overwritten shows a different key,
+    and only then is the tab re-read from the sheet.
+    """
+
+    def __init__(self, sheet_id, tab_name, width, legacy_key=None, index_dir=ROW_INDEX_DIR):
+        self.sheet_id = sheet_id
+        self.tab_name = tab_name
+        self.width = width
+        self.last_col = chr(ord('A') + width - 1)
+        self.range_name = f"'{tab_name}'!A:{self.last_col}"
+        # Optional row -> key fallback for rows written before they carried a key column
+        self.legacy_key = legacy_key
+        slug = re.sub(r"[^A-Za-z0-9_-]+", "_", tab_name)
+        self.path = os.path.join(index_dir, f"{sheet_id}__{slug}.json")
+        self.rows = {}
+        self._legacy = {}
+        self._pending_appends = []
+        self._loaded = self._load()
+
+    def _load(self):
+        rows = load_json(self.path)
+        self.rows = rows or {}
+        return rows is not None
+
+    def save(self):
+        save_json(self.path, self.rows)
+        self._loaded = True
+
+    def invalidate(self):
+        """Forget the local index so the next upsert reconciles with the sheet"""
+        self.rows = {}
+        self._loaded = False
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def reconcile(self, client):
+        """Rebuild the index from the sheet; only needed on first use or after drift"""
+        values = client.service.spreadsheets().values().get(
+            spreadsheetId=self.sheet_id,
+            range=self.range_name
+        ).execute().get('values', [])
+        self.rows = {}
+        self._legacy = {}
+        key_idx = self.width - 1
+        for row_num, row in enumerate(values, start=1):
+            if len(row) > key_idx and row[key_idx]:
+                self.rows[row[key_idx]] = row_num
+            elif row and self.legacy_key:
+                self._legacy[self.legacy_key(row)] = row_num
+        print(f"🔄 Reconciled row index for '{self.tab_name}': {len(self.rows)} keyed rows")
+        self._loaded = True
+
+    def verify(self, client, keys):
+        """Spot-check that the indexed rows for `keys` still hold those keys (one batchGet)"""
+        ranges = [f"'{self.tab_name}'!{self.last_col}{self.rows[key]}" for key in keys]
+        resp = client.service.spreadsheets().values().batchGet(
+            spreadsheetId=self.sheet_id,
+            ranges=ranges
+        ).execute()
+        for key, value_range in zip(keys, resp.get('valueRanges', [])):
+            values = value_range.get('values', [])
+            if not values or not values[0] or values[0][0] != key:
+                print(f"⚠️ Row index drift detected at {value_range.get('range')}")
+                return False
+        return True
+
+    def upsert(self, client, rows):
+        """Queue each row (key in its last column) as an in-place update or an append.
+
+        Call client.flush() and then record_appends(client) to learn the new rows' positions.
+        Returns the number of rows queued.
+        """
+        if not self._loaded:
+            self.reconcile(client)
+        known = [row[-1] for row in rows if row[-1] in self.rows]
+        if known:
+            try:
+                in_sync = self.verify(client, known)
+            except Exception as e:
+                print(f"Warning: Could not verify row index: {e}")
+                in_sync = False
+            if not in_sync:
+                self.reconcile(client)
+        for row in rows:
+            key = row[-1]
+            row_num = self.rows.get(key)
+            if row_num is None and self.legacy_key:
+                row_num = self._legacy.pop(self.legacy_key(row), None)
+            if row_num is not None:
+                self.rows[key] = row_num
+                print(f"Updating row {row_num} with: {row}")
+                client.queue_write(self.sheet_id, f"'{self.tab_name}'!A{row_num}:{self.last_col}{row_num}", row)
+            else:
+                print(f"Appending new row: {row}")
+                client.queue_append(self.sheet_id, self.range_name, row)
+                self._pending_appends.append(key)
+        return len(rows)
+
+    def record_appends(self, client):
+        """Index the rows appended by the last flush using the range Sheets reported, then persist"""
+        pending, self._pending_appends = self._pending_appends, []
+        updated_range = client.appended_ranges.get((self.sheet_id, self.range_name))
+        match = _RANGE_START_ROW.search(updated_range or "")
+        if pending and not match:
+            # Append failed or gave no range; positions unknown, so rebuild from the sheet next time
+            self.invalidate()
+            return
+        if match:
+            start = int(match.group(1))
+            for offset, key in enumerate(pending):
+                self.rows[key] = start + offset
+        self.save()
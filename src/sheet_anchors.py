@@ -0,0 +1,135 @@
+import os
+import time
+import threading
+from local_cache import cache_path, load_json, save_json
+
+ANCHOR_CACHE_FILE = cache_path('anchors.json')
+# Layout edits that keep every tab's grid size (e.g. cutting a header to another row) are only
+# picked up on a miss, or once the cached scan is this old
+ANCHOR_TTL = int(os.getenv("SHEET_ANCHOR_TTL", 24 * 3600))
+SCAN_ROWS = 100  # anchors are looked for in column A of the first SCAN_ROWS rows of each tab
+
+MEETING_CADENCE = "meeting cadence"
+
+_resolvers = {}
+_resolvers_lock = threading.Lock()
+
+
+def normalize(label):
+    return " ".join(str(label).split()).lower()
+
+
+def layout_fingerprint(metadata):
+    """Tabs, their IDs and grid sizes from spreadsheets.get metadata.
+
+    Inserting, deleting or moving rows and adding or renaming tabs all change it; plain value
+    writes (which every run makes) do not, so it stays valid across our own runs.
+    """
+    parts = []
+    for sheet in metadata.get("sheets", []):
+        props = sheet.get("properties", {})
+        grid = props.get("gridProperties", {})
+        parts.append(f"{props.get('sheetId')}:{props.get('title')}:{grid.get('rowCount')}x{grid.get('columnCount')}")
+    return "|".join(parts)
+
+
+class AnchorResolver:
+    """Row numbers of named anchors (header labels in column A) across every tab of a sheet.
+
+    All tabs are scanned with one values.batchGet and the positions are cached on disk,
+    keyed on the sheet's layout fingerprint, so a normal run finds its headers without
+    reading the sheet at all.
+    """
+
+    def __init__(self, client, sheet_id, cache_file=ANCHOR_CACHE_FILE, ttl=ANCHOR_TTL):
+        self.client = client
+        self.sheet_id = sheet_id
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.tabs = []
+        self.fingerprint = None
+        self.anchors = {}  # tab title -> {normalized label: row}
+        self.scanned_at = 0
+        self._scanned_this_run = False
+        self._load()
+
+    def _load(self):
+        entry = load_json(self.cache_file, {}).get(self.sheet_id, {})
+        self.fingerprint = entry.get("fingerprint")
+        self.anchors = entry.get("anchors", {})
+        self.scanned_at = entry.get("scanned_at", 0)
+
+    def _save(self):
+        cache = load_json(self.cache_file, {})
+        cache[self.sheet_id] = {"fingerprint": self.fingerprint, "anchors": self.anchors,
+                                "scanned_at": self.scanned_at}
+        save_json(self.cache_file, cache)
+
+    def _metadata(self):
+        # test_connection keeps the metadata it fetches, so this is normally free
+        if self.sheet_id not in self.client.metadata:
+            self.client.metadata[self.sheet_id] = self.client.service.spreadsheets().get(
+                spreadsheetId=self.sheet_id).execute()
+        return self.client.metadata[self.sheet_id]
+
+    def _scan(self):
+        """Read column A of every tab in one batchGet and index the non-empty labels"""
+        resp = self.client.service.spreadsheets().values().batchGet(
+            spreadsheetId=self.sheet_id,
+            ranges=[f"'{tab}'!A1:A{SCAN_ROWS}" for tab in self.tabs]
+        ).execute()
+        self.anchors = {}
+        for tab, value_range in zip(self.tabs, resp.get("valueRanges", [])):
+            labels = self.anchors[tab] = {}
+            for row_num, row in enumerate(value_range.get("values", []), start=1):
+                if row and str(row[0]).strip():
+                    labels.setdefault(normalize(row[0]), row_num)  # first occurrence wins
+        self.scanned_at = time.time()
+        self._scanned_this_run = True
+        print(f"🔄 Scanned {len(self.tabs)} tabs for sheet anchors")
+        self._save()
+
+    def _ensure(self):
+        metadata = self._metadata()
+        self.tabs = [sheet["properties"]["title"] for sheet in metadata.get("sheets", [])]
+        fingerprint = layout_fingerprint(metadata)
+        stale = time.time() - self.scanned_at > self.ttl
+        if fingerprint != self.fingerprint or stale:
+            self.fingerprint = fingerprint
+            self._scan()
+
+    def find(self, label, tab=None):
+        """1-based row of `label` in column A of `tab` (default: the first tab), or None.
+
+        A cached miss is confirmed with one rescan, in case the header was added since.
+        """
+        with self._lock:
+            self._ensure()
+            tab = tab or (self.tabs[0] if self.tabs else None)
+            row = self.anchors.get(tab, {}).get(normalize(label))
+            if row is None and not self._scanned_this_run:
+                self._scan()
+                row = self.anchors.get(tab, {}).get(normalize(label))
+            return row
+
+    def record(self, label, row, tab=None):
+        """Remember an anchor a writer has just created, so the next run does not rescan for it"""
+        with self._lock:
+            tab = tab or (self.tabs[0] if self.tabs else None)
+            self.anchors.setdefault(tab, {})[normalize(label)] = row
+            self._save()
+
+    def invalidate(self):
+        with self._lock:
+            self.fingerprint = None
+            self.anchors = {}
+
+
+def get_anchor_resolver(client, sheet_id):
+    """One resolver per sheet for the life of the process"""
+    with _resolvers_lock:
+        resolver = _resolvers.get(sheet_id)
+        if resolver is None or resolver.client is not client:
+            resolver = _resolvers[sheet_id] = AnchorResolver(client, sheet_id)
+        return resolver
@@ -0,0 +1,192 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from instrumentation import metrics
+
+# Google's default per-user write quota for the Sheets API
+WRITES_PER_MINUTE = int(os.getenv("SHEETS_WRITES_PER_MINUTE", 60))
+BATCH_SIZE = 500        # flush once this many distinct rows/ranges are pending...
+FLUSH_INTERVAL = 2.0    # ...or this many seconds after the first one was queued
+MAX_PENDING = 5000      # producers block in put() beyond this (backpressure)
+MAX_BACKOFF = 60.0
+
+
+class WriteQuota:
+    """Token bucket of Sheets write requests per minute; a flush costs one token per request it sends"""
+
+    def __init__(self, per_minute=WRITES_PER_MINUTE):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.tokens = float(per_minute)
+        self.updated = time.monotonic()
+
+    def wait_time(self, cost):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= cost else (cost - self.tokens) / self.rate
+
+    def take(self, cost):
+        self.tokens -= cost
+
+
+class SheetsWriter:
+    """Background writer that producers hand row mutations to while they keep fetching.
+
+    put(key, row) upserts a keyed row through `row_index`; put_range(range, values) writes
+    a fixed range. Mutations for the same key or range are coalesced (the latest wins), so a
+    row touched several times in one run is written once. Pending work is flushed in one
+    client.flush() when BATCH_SIZE entries are waiting or FLUSH_INTERVAL has passed, as far
+    as the write quota allows; a failed flush is retried with backoff, merged under any newer
+    mutations. When MAX_PENDING entries are waiting, put() blocks until a flush drains them.
+
+    The writer thread is the only user of `client`'s write queue while it runs.
+    """
+
+    def __init__(self, client, sheet_id, row_index=None, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL,
+                 max_pending=MAX_PENDING, quota=None):
+        self.client = client
+        self.sheet_id = sheet_id
+        self.row_index = row_index
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.quota = quota or WriteQuota()
+        self._rows = OrderedDict()    # key -> row
+        self._ranges = OrderedDict()  # A1 range -> values
+        self._first_at = None
+        self._retry_at = 0
+        self._failures = 0
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self.queued = 0
+        self.coalesced = 0
+        self.written = 0
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def pending(self):
+        with self._cond:
+            return len(self._rows) + len(self._ranges)
+
+    def _put(self, attr, key, value):
+        with self._cond:
+            waited = time.perf_counter()
+            # Only new entries count against MAX_PENDING; coalescing never blocks
+            while (key not in getattr(self, attr) and not self._stopping
+                   and len(self._rows) + len(self._ranges) >= self.max_pending):
+                self._cond.wait()
+            if time.perf_counter() - waited > 0.001:
+                metrics.record_throttle("sheets", "writer.backpressure", time.perf_counter() - waited)
+            # Looked up after waiting: a flush swaps in fresh dicts
+            target = getattr(self, attr)
+            if key in target:
+                self.coalesced += 1
+                target.pop(key)  # re-insert so flush order follows the latest mutation
+            first = not self._rows and not self._ranges
+            if first:
+                self._first_at = time.monotonic()
+            target[key] = value
+            self.queued += 1
+            # Wake the writer on the first entry (to start its flush timer) and once a batch is full
+            if first or len(self._rows) + len(self._ranges) >= self.batch_size:
+                self._cond.notify_all()
+
+    def put(self, key, row):
+        """Queue an upsert of `row`, whose last column is `key`"""
+        self._put("_rows", key, row)
+
+    def put_range(self, cell_range, values):
+        """Queue a write of `values` (a row or a list of rows) to a fixed range"""
+        self._put("_ranges", cell_range, values)
+
+    def _cost(self, rows, ranges):
+        # One values.batchUpdate for in-place writes and ranges, plus one append when rows may be new
+        return 2 if rows else 1
+
+    def _take_batch(self):
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                size = len(self._rows) + len(self._ranges)
+                if not size:
+                    if self._stopping:
+                        break
+                    wait = None
+                elif now < self._retry_at:
+                    wait = self._retry_at - now
+                elif self._stopping or size >= self.batch_size or now - self._first_at >= self.flush_interval:
+                    wait = self.quota.wait_time(self._cost(self._rows, self._ranges))
+                    if not wait:
+                        break
+                    metrics.record_throttle("sheets", "writer.quota", wait)
+                else:
+                    wait = self.flush_interval - (now - self._first_at)
+                self._cond.wait(wait)
+            rows, self._rows = self._rows, OrderedDict()
+            ranges, self._ranges = self._ranges, OrderedDict()
+            if rows or ranges:
+                self.quota.take(self._cost(rows, ranges))
+            self._cond.notify_all()  # room for blocked producers
+            return rows, ranges
+
+    def _flush(self, rows, ranges):
+        if not rows and not ranges:
+            return True
+        try:
+            for cell_range, values in ranges.items():
+                self.client.queue_write(self.sheet_id, cell_range, values)
+            if rows:
+                self.row_index.upsert(self.client, list(rows.values()))
+            ok = self.client.flush()
+            if rows:
+                self.row_index.record_appends(self.client)
+        except Exception as e:
+            print(f"❌ Sheets writer flush failed: {e}")
+            ok = False
+        with self._cond:
+            if ok:
+                self.written += len(rows) + len(ranges)
+                self._failures = 0
+                self._retry_at = 0
+                return True
+            # Put the batch back under anything queued since; newer mutations win
+            for target, batch in ((self._rows, rows), (self._ranges, ranges)):
+                merged = OrderedDict(batch)
+                merged.update(target)
+                target.clear()
+                target.update(merged)
+            self._failures += 1
+            self._first_at = time.monotonic()
+            self._retry_at = self._first_at + min(MAX_BACKOFF, self.flush_interval * 2 ** self._failures)
+            print(f"⏳ Retrying {len(rows) + len(ranges)} writes in {self._retry_at - self._first_at:.0f}s")
+            return False
+
+    def _run(self):
+        while True:
+            rows, ranges = self._take_batch()
+            self._flush(rows, ranges)
+            with self._cond:
+                if self._stopping and (self._failures > 3 or not (self._rows or self._ranges)):
+                    break
+
+    def close(self):
+        """Flush everything still queued and stop the thread; True if nothing was left unwritten"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join()
+        left = self.pending()
+        if left:
+            print(f"❌ {left} queued writes could not be written")
+        return not left
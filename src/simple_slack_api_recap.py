@@ -1,20 +1,14 @@
 import os
 import json
-import requests
 from datetime import datetime
 from dotenv import load_dotenv
+from user_directory import get_user_directory
+from slack_api import paginate, SlackApiError
+from channel_fetcher import fetch_history
 
-# Helper: Get user display name from Slack user ID
+# Helper: Get user display name from Slack user ID (cached workspace directory)
 def get_user_display_name(user_id, token):
-    url = f"https://slack.com/api/users.info"
-    headers = {"Authorization": f"Bearer {token}"}
-    params = {"user": user_id}
-    resp = requests.get(url, headers=headers, params=params)
-    data = resp.json()
-    if data.get("ok") and "user" in data:
-        profile = data["user"].get("profile", {})
-        return profile.get("display_name") or profile.get("real_name") or user_id
-    return user_id
+    return get_user_directory(token).get_display_name(user_id)
 
 # Load .env file from project root
 env_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.env'))
@@ -28,27 +22,15 @@ if not SLACK_BOT_TOKEN:
 
 # Example: List all public channels
 def list_channels():
-    url = "https://slack.com/api/conversations.list"
-    headers = {"Authorization": f"Bearer {SLACK_BOT_TOKEN}"}
-    params = {"exclude_archived": True, "limit": 1000}
-    resp = requests.get(url, headers=headers, params=params)
-    data = resp.json()
-    if not data.get("ok"):
-        print("Error listing channels:", data)
+    try:
+        return list(paginate(SLACK_BOT_TOKEN, "conversations.list", "channels", {"exclude_archived": True}))
+    except SlackApiError as e:
+        print("Error listing channels:", e.data)
         return []
-    return data["channels"]
 
 # Example: Fetch recent messages from a channel
 def fetch_channel_messages(channel_id, limit=100):
-    url = "https://slack.com/api/conversations.history"
-    headers = {"Authorization": f"Bearer {SLACK_BOT_TOKEN}"}
-    params = {"channel": channel_id, "limit": limit}
-    resp = requests.get(url, headers=headers, params=params)
-    data = resp.json()
-    if not data.get("ok"):
-        print(f"Error fetching messages for {channel_id}:", data)
-        return []
-    return data["messages"]
+    return fetch_history(SLACK_BOT_TOKEN, channel_id, limit=limit) or []
 
 if __name__ == "__main__":
     print("\n--- SLACK CHANNELS ---")
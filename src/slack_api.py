@@ -0,0 +1,183 @@
+import os
+import time
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from instrumentation import metrics
+from local_cache import Shared
+
+SLACK_API_URL = os.getenv("SLACK_API_URL", "https://slack.com/api")
+
+# Slack Web API rate-limit tiers (https://api.slack.com/apis/rate-limits), requests per minute
+TIER_LIMITS = {1: 1, 2: 20, 3: 50, 4: 100}
+# Multiplier on every tier budget; only meant for local fake servers in benchmarks
+RATE_LIMIT_SCALE = float(os.getenv("SLACK_RATE_LIMIT_SCALE", 1))
+METHOD_TIERS = {
+    "conversations.list": 2,
+    "users.list": 2,
+    "conversations.history": 3,
+    "conversations.replies": 3,
+    "conversations.info": 3,
+    "conversations.join": 3,
+    "users.conversations": 3,
+    "users.info": 4,
+}
+DEFAULT_TIER = 3
+MAX_RETRIES = 5
+PAGE_SIZE = 200  # Slack's recommended upper bound for cursor-paginated methods
+REQUEST_TIMEOUT = (float(os.getenv("SLACK_CONNECT_TIMEOUT", 5)), float(os.getenv("SLACK_READ_TIMEOUT", 30)))
+POOL_SIZE = 16  # keep-alive connections per client; matches the widest fetch fan-out
+
+
+class SlackApiError(Exception):
+    """Raised when a Slack Web API call returns ok=false"""
+
+    def __init__(self, method, data):
+        super().__init__(f"{method} failed: {data.get('error', data)}")
+        self.method = method
+        self.data = data
+
+
+class RateLimiter:
+    """Thread-safe token bucket per Slack method, sized from the method's tier"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}  # method -> [tokens, last refill time, blocked until]
+
+    def _limit(self, method):
+        return TIER_LIMITS[METHOD_TIERS.get(method, DEFAULT_TIER)] * RATE_LIMIT_SCALE
+
+    def acquire(self, method):
+        """Block until a request to `method` fits in its tier budget"""
+        limit = self._limit(method)
+        rate = limit / 60.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                tokens, last, blocked_until = self._buckets.get(method, [limit, now, 0])
+                tokens = min(limit, tokens + (now - last) * rate)
+                if now >= blocked_until and tokens >= 1:
+                    self._buckets[method] = [tokens - 1, now, blocked_until]
+                    return
+                self._buckets[method] = [tokens, now, blocked_until]
+                wait = max(blocked_until - now, (1 - tokens) / rate)
+            time.sleep(wait)
+
+    def penalize(self, method, seconds):
+        """Hold every caller of `method` back for `seconds`, as instructed by Retry-After"""
+        with self._lock:
+            now = time.monotonic()
+            blocked_until = self._buckets.get(method, [0, now, 0])[2]
+            self._buckets[method] = [0, now, max(blocked_until, now + seconds)]
+
+
+rate_limiter = RateLimiter()
+
+
+class SlackClient:
+    """Slack Web API client over one pooled keep-alive session.
+
+    Connection failures and 5xx responses are retried with exponential backoff by the
+    transport; 429s are retried here after Retry-After so the shared rate limiter knows.
+    """
+
+    def __init__(self, token, timeout=REQUEST_TIMEOUT, pool_size=POOL_SIZE):
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Authorization": f"Bearer {token}",
+            "Accept-Encoding": "gzip, deflate",
+        })
+        retry = Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=("GET", "POST"),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def call(self, method, params=None):
+        """Call a Web API method, waiting for tier budget and retrying on HTTP 429"""
+        url = f"{SLACK_API_URL}/{method}"
+        elapsed, retries, sent, received = 0.0, 0, 0, 0
+        result = {"ok": False, "error": "ratelimited"}
+        for attempt in range(MAX_RETRIES):
+            waited = time.perf_counter()
+            rate_limiter.acquire(method)
+            metrics.record_throttle("slack", method, time.perf_counter() - waited)
+            start = time.perf_counter()
+            try:
+                resp = self.session.get(url, params=params, timeout=self.timeout)
+            except requests.RequestException as e:
+                elapsed += time.perf_counter() - start
+                result = {"ok": False, "error": f"request_failed: {e}"}
+                break
+            elapsed += time.perf_counter() - start
+            sent += len(resp.request.url)
+            received += len(resp.content)
+            # 5xx/connection retries done by the transport
+            history = getattr(getattr(resp.raw, "retries", None), "history", None)
+            retries += len(history) if history else 0
+            if resp.status_code == 429:
+                metrics.record_rate_limited("slack", method)
+                retries += 1
+                retry_after = int(resp.headers.get("Retry-After", 1))
+                print(f"⏳ Rate limited on {method}, retrying in {retry_after}s ({attempt + 1}/{MAX_RETRIES})")
+                rate_limiter.penalize(method, retry_after)
+                continue
+            try:
+                result = resp.json()
+            except ValueError:
+                result = {"ok": False, "error": f"http_{resp.status_code}"}
+            break
+        metrics.record_call("slack", method, elapsed, ok=bool(result.get("ok")), bytes_sent=sent, bytes_received=received,
+                            retries=retries)
+        return result
+
+
+_clients = Shared()
+
+
+def get_slack_client(token):
+    """The process-wide SlackClient for `token`, so every call reuses the same connections"""
+    return _clients.get(token, lambda: SlackClient(token))
+
+
+def api_get(token, method, params=None):
+    """Call a Slack Web API method through the token's shared pooled client"""
+    return get_slack_client(token).call(method, params)
+
+
+def iter_pages(token, method, key, params=None, cursor=None, page_size=PAGE_SIZE):
+    """Yield (items, next_cursor) for each page of a cursor-paginated method.
+
+    Starting from `cursor` lets long-running callers checkpoint the cursor after each
+    page and resume there. Raises SlackApiError if any page comes back with ok=false.
+    """
+    params = dict(params or {}, limit=page_size)
+    while True:
+        if cursor:
+            params["cursor"] = cursor
+        data = api_get(token, method, params)
+        if not data.get("ok"):
+            raise SlackApiError(method, data)
+        cursor = data.get("response_metadata", {}).get("next_cursor") or None
+        yield data.get(key, []), cursor
+        if not cursor:
+            return
+
+
+def paginate(token, method, key, params=None, page_size=PAGE_SIZE):
+    """Yield the items under `key` from every page of a cursor-paginated method.
+
+    Pages are requested lazily, so memory stays at one page and breaking out of the
+    loop (e.g. once a channel name matches) stops further requests.
+    Raises SlackApiError if any page comes back with ok=false.
+    """
+    for items, _ in iter_pages(token, method, key, params, page_size=page_size):
+        yield from items
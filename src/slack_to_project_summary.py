@@ -1,8 +1,12 @@
 import os
 from datetime import datetime
-from google_sheets_real import GoogleSheetsClient
+from google_sheets_real import get_sheets_client
+from sheet_anchors import get_anchor_resolver, MEETING_CADENCE
+from user_directory import get_user_directory
+from channel_index import get_channel_index
+from channel_fetcher import fetch_history
+from membership import get_membership
 from dotenv import load_dotenv
-import requests
 
 # Load environment variables
 load_dotenv(os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env'))
@@ -14,47 +18,26 @@ NUM_MESSAGES = 5
 TAB_NAME = "project summary"  # The tab to write to
 
 def get_user_display_name(user_id, token):
-    url = f"https://slack.com/api/users.info"
-    headers = {"Authorization": f"Bearer {token}"}
-    params = {"user": user_id}
-    resp = requests.get(url, headers=headers, params=params)
-    data = resp.json()
-    if data.get("ok") and "user" in data:
-        profile = data["user"].get("profile", {})
-        return profile.get("display_name") or profile.get("real_name") or user_id
-    return user_id
+    return get_user_directory(token).get_display_name(user_id)
 
 def fetch_last_messages(token, channel_name, num_messages):
     # 1. List channels to find the channel ID
-    url = "https://slack.com/api/conversations.list"
-    headers = {"Authorization": f"Bearer {token}"}
-    params = {"exclude_archived": True, "limit": 1000}
-    resp = requests.get(url, headers=headers, params=params)
-    data = resp.json()
-    if not data.get("ok"):
-        print("Error listing channels:", data)
-        return []
-    channels = data["channels"]
-    channel_id = None
-    for ch in channels:
-        if ch["name"] == channel_name:
-            channel_id = ch["id"]
-            break
+    channel_id = get_channel_index(token).find_id(channel_name)
     if not channel_id:
         print(f"Channel '{channel_name}' not found.")
         return []
-    # 2. Fetch last N messages
-    url = "https://slack.com/api/conversations.history"
-    params = {"channel": channel_id, "limit": num_messages}
-    resp = requests.get(url, headers=headers, params=params)
-    data = resp.json()
-    if not data.get("ok"):
-        print(f"Error fetching messages for {channel_id}:", data)
+    if not get_membership(token).is_member(channel_id):
+        print(f"Bot is not a member of #{channel_name}; invite it or run check_bot_membership.py --join.")
+        return []
+    # 2. Fetch last N messages (also recorded in the local message store)
+    messages = fetch_history(token, channel_id, limit=num_messages)
+    if messages is None:
         return []
-    return list(reversed(data["messages"]))
+    return list(reversed(messages))
 
-def main():
-    messages = fetch_last_messages(SLACK_BOT_TOKEN, CHANNEL_NAME, NUM_MESSAGES)
+def write_under_header(channel_name, num_messages=NUM_MESSAGES, tab_name=TAB_NAME):
+    """Write a channel's last messages below the 'Meeting Cadence' header, wherever it is. Returns True on success."""
+    messages = fetch_last_messages(SLACK_BOT_TOKEN, channel_name, num_messages)
     automation_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     rows = []
     print("\n--- MESSAGES FOUND IN SLACK ---")
@@ -72,30 +55,30 @@ def main():
     print("--- END SLACK MESSAGES ---\n")
 
     # Write to Google Sheet under 'project summary' tab, below header (lines 24-26)
-    client = GoogleSheetsClient()
+    client = get_sheets_client()
     client.test_connection(SHEET_ID)
-    # Read the tab to find the row with the header (search first 40 rows)
-    range_name = f"'{TAB_NAME}'!A1:A40"
-    sheet = client.service.spreadsheets().values().get(
-        spreadsheetId=SHEET_ID,
-        range=range_name
-    ).execute()
-    values = sheet.get('values', [])
-    header_row = None
-    for idx, row in enumerate(values):
-        if row and row[0].strip().lower() == 'meeting cadence':
-            header_row = idx + 1  # 1-based
-            break
+    # Header position comes from the shared anchor cache; the sheet is only scanned when its layout changed
+    anchors = get_anchor_resolver(client, SHEET_ID)
+    header_row = anchors.find(MEETING_CADENCE, tab_name)
     if header_row is None:
-        print(f"❌ 'Meeting Cadence' header not found in '{TAB_NAME}'. Writing to row 2 instead.")
+        print(f"❌ 'Meeting Cadence' header not found in '{tab_name}'. Writing to row 2 instead.")
         start_row = 2
-        client.write_data(SHEET_ID, f"'{TAB_NAME}'!A1:C1", ["Meeting Cadence", "Message", "Execution Timestamp"])
+        client.queue_write(SHEET_ID, f"'{tab_name}'!A1:C1", ["Meeting Cadence", "Message", "Execution Timestamp"])
     else:
         start_row = header_row + 1
     for i, row in enumerate(rows):
-        cell_range = f"'{TAB_NAME}'!A{start_row + i}:C{start_row + i}"
-        client.write_data(SHEET_ID, cell_range, row)
-    print(f"✅ Wrote {len(rows)} messages from #{CHANNEL_NAME} under 'Meeting Cadence' in '{TAB_NAME}'.")
+        cell_range = f"'{tab_name}'!A{start_row + i}:C{start_row + i}"
+        client.queue_write(SHEET_ID, cell_range, row)
+    if not client.flush():
+        return False
+    if header_row is None:
+        # Only remember the new header once it is actually in the sheet
+        anchors.record(MEETING_CADENCE, 1, tab_name)
+    print(f"✅ Wrote {len(rows)} messages from #{channel_name} under 'Meeting Cadence' in '{tab_name}'.")
+    return True
+
+def main():
+    write_under_header(CHANNEL_NAME, NUM_MESSAGES, TAB_NAME)
 
 if __name__ == "__main__":
     main()
@@ -1,8 +1,14 @@
 import os
 from datetime import datetime
-from google_sheets_real import GoogleSheetsClient
+from google_sheets_real import get_sheets_client
+from sheet_anchors import get_anchor_resolver, MEETING_CADENCE
+from user_directory import get_user_directory
+from channel_index import get_channel_index
+from channel_fetcher import fetch_history
+from membership import get_membership
+from thread_expander import expand_threads
+from mrkdwn import MrkdwnRenderer
 from dotenv import load_dotenv
-import requests
 
 # Load environment variables
 load_dotenv(os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env'))
@@ -12,94 +18,49 @@ SLACK_BOT_TOKEN = os.getenv("SLACK_BOT_TOKEN")
 CHANNEL_NAME = "integration_testing"  # Change as needed
 NUM_MESSAGES = 5
 TAB_NAME = "project summary"  # The tab to write to
+HEADER_ROW = 27  # Fallback header row when the tab has no 'Meeting Cadence' anchor; messages start below it
 
 def get_user_display_name(user_id, token):
-    url = f"https://slack.com/api/users.info"
-    headers = {"Authorization": f"Bearer {token}"}
-    params = {"user": user_id}
-    resp = requests.get(url, headers=headers, params=params)
-    data = resp.json()
-    if data.get("ok") and "user" in data:
-        profile = data["user"].get("profile", {})
-        return profile.get("display_name") or profile.get("real_name") or user_id
-    return user_id
+    return get_user_directory(token).get_display_name(user_id)
 
 def fetch_last_messages(token, channel_name, num_messages):
     # 1. List channels to find the channel ID
-    url = "https://slack.com/api/conversations.list"
-    headers = {"Authorization": f"Bearer {token}"}
-    params = {"exclude_archived": True, "limit": 1000}
-    resp = requests.get(url, headers=headers, params=params)
-    data = resp.json()
-    if not data.get("ok"):
-        print("Error listing channels:", data)
-        return []
-    channels = data["channels"]
-    channel_id = None
-    for ch in channels:
-        if ch["name"] == channel_name:
-            channel_id = ch["id"]
-            break
+    channel_id = get_channel_index(token).find_id(channel_name)
     if not channel_id:
         print(f"Channel '{channel_name}' not found.")
         return []
-    # 2. Fetch last N messages
-    url = "https://slack.com/api/conversations.history"
-    params = {"channel": channel_id, "limit": num_messages}
-    resp = requests.get(url, headers=headers, params=params)
-    data = resp.json()
-    if not data.get("ok"):
-        print(f"Error fetching messages for {channel_id}:", data)
+    if not get_membership(token).is_member(channel_id):
+        print(f"Bot is not a member of #{channel_name}; invite it or run check_bot_membership.py --join.")
+        return []
+    # 2. Fetch last N messages (also recorded in the local message store)
+    messages = fetch_history(token, channel_id, limit=num_messages)
+    if messages is None:
         return []
-    return list(reversed(data["messages"]))
+    # 3. Attach thread replies, only re-fetching threads with new replies
+    expand_threads(token, {channel_id: messages})
+    return list(reversed(messages))
 
-def main():
-    # Print all accessible channels (name and ID)
-    print("\n--- ACCESSIBLE SLACK CHANNELS ---")
-    url = "https://slack.com/api/conversations.list"
-    headers = {"Authorization": f"Bearer {SLACK_BOT_TOKEN}"}
-    params = {"exclude_archived": True, "limit": 1000}
-    resp = requests.get(url, headers=headers, params=params)
-    data = resp.json()
-    if data.get("ok"):
-        for ch in data["channels"]:
-            print(f"Channel: {ch['name']} (ID: {ch['id']})")
-    else:
-        print("Error fetching channels:", data)
-    messages = fetch_last_messages(SLACK_BOT_TOKEN, CHANNEL_NAME, NUM_MESSAGES)
+def write_meeting_cadence(channel_name, num_messages=NUM_MESSAGES, tab_name=TAB_NAME, header_row=None):
+    """Write a channel's last messages (with thread replies) below the header row. Returns True on success.
+
+    The header row is the tab's 'Meeting Cadence' anchor unless `header_row` is given, and
+    HEADER_ROW if the tab has no such anchor.
+    """
+    messages = fetch_last_messages(SLACK_BOT_TOKEN, channel_name, num_messages)
     automation_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     rows = []
     print("\n--- MESSAGES FOUND IN SLACK ---")
-    # Build a user ID to display name map for all users in the workspace
-    def build_user_map(token):
-        url = "https://slack.com/api/users.list"
-        headers = {"Authorization": f"Bearer {token}"}
-        resp = requests.get(url, headers=headers)
-        data = resp.json()
-        user_map = {}
-        if data.get("ok"):
-            for user in data["members"]:
-                uid = user["id"]
-                profile = user.get("profile", {})
-                display = profile.get("display_name") or profile.get("real_name") or uid
-                user_map[uid] = display
-        return user_map
-
-    user_map = build_user_map(SLACK_BOT_TOKEN)
-
-    import re
-    mention_pattern = re.compile(r'<@([A-Z0-9]+)>')
+    # User ID to display name map for all users in the workspace (cached on disk)
+    user_map = get_user_directory(SLACK_BOT_TOKEN).user_map()
+    # Renders mentions, channel refs, links and emoji with the same lookups for every message
+    renderer = MrkdwnRenderer(users=user_map, channels=get_channel_index(SLACK_BOT_TOKEN).names_by_id())
 
     for msg in messages:
         ts = float(msg.get('ts', 0))
         dt = datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S')
         user_id = msg.get('user', 'bot/system')
         text = msg.get('text', '')
-        # Replace all <@Uxxxx> with display names in the message body
-        def replace_mention(match):
-            uid = match.group(1)
-            return user_map.get(uid, uid)
-        text_clean = mention_pattern.sub(replace_mention, text)
+        text_clean = renderer.render(text)
         if user_id != 'bot/system':
             display_name = user_map.get(user_id, user_id)
         else:
@@ -107,25 +68,40 @@ def main():
         # Format: Name appears only at the start, in bold, message body as in Slack
         formatted_message = f"**{display_name}**: {text_clean.strip()}"
         print(f"[{dt}] {display_name}: {text_clean.strip()}")
+        # Thread replies go under their parent in the same cell
+        for reply in msg.get('replies', []):
+            reply_name = user_map.get(reply.get('user'), reply.get('user', 'bot/system'))
+            reply_text = renderer.render(reply.get('text', '')).strip()
+            formatted_message += f"\n  ↳ **{reply_name}**: {reply_text}"
         rows.append([dt, formatted_message])
     print("--- END SLACK MESSAGES ---\n")
 
     # Only write if there are messages to write
     if not rows:
         print("No Slack messages found. Nothing written to the sheet.")
-        return
+        return True
 
-    client = GoogleSheetsClient()
+    client = get_sheets_client()
     client.test_connection(SHEET_ID)
-    # Write headers to line 27 (do not change them)
-    header_row = 27
-    # Write messages starting at line 28, only to columns A and B
+    if header_row is None:
+        header_row = get_anchor_resolver(client, SHEET_ID).find(MEETING_CADENCE, tab_name) or HEADER_ROW
+    # Write messages starting below the header row, only to columns A and B
     for i, row in enumerate(rows):
-        cell_range = f"'{TAB_NAME}'!A{header_row + 1 + i}:B{header_row + 1 + i}"
-        client.write_data(SHEET_ID, cell_range, row)
+        cell_range = f"'{tab_name}'!A{header_row + 1 + i}:B{header_row + 1 + i}"
+        client.queue_write(SHEET_ID, cell_range, row)
     # Write automation run time only once in column C, at the first message row
-    client.write_data(SHEET_ID, f"'{TAB_NAME}'!C{header_row + 1}", [automation_time])
-    print(f"✅ Wrote {len(rows)} messages from #{CHANNEL_NAME} to '{TAB_NAME}' starting at row {header_row + 1}.")
+    client.queue_write(SHEET_ID, f"'{tab_name}'!C{header_row + 1}", [automation_time])
+    if not client.flush():
+        return False
+    print(f"✅ Wrote {len(rows)} messages from #{channel_name} to '{tab_name}' starting at row {header_row + 1}.")
+    return True
+
+def main():
+    # Print all accessible channels (name and ID)
+    print("\n--- ACCESSIBLE SLACK CHANNELS ---")
+    for name, ch in get_channel_index(SLACK_BOT_TOKEN).active_channels():
+        print(f"Channel: {name} (ID: {ch['id']})")
+    write_meeting_cadence(CHANNEL_NAME, NUM_MESSAGES, TAB_NAME)
 
 if __name__ == "__main__":
     main()
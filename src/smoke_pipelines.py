@@ -0,0 +1,165 @@
+import os
+import sys
+import time
+import threading
+import shutil
+import argparse
+import tempfile
+from contextlib import redirect_stdout
+
+from fake_services import FakeEventSource, FakeSlackServer, FakeSheetsService, make_workspace
+
+# Pipelines read their configuration at import time, so the throwaway cache directory and
+# fake credentials have to be in the environment first (as in benchmark_pipelines.py)
+CACHE_DIR = tempfile.mkdtemp(prefix="slack-smoke-")
+os.environ.update({
+    "SLACK_BOT_TOKEN": "xoxb-smoke",
+    "GOOGLE_SHEET_ID": "smoke-sheet",
+    "SLACK_SUMMARY_CACHE_DIR": CACHE_DIR,
+    "SLACK_MESSAGE_DB": os.path.join(CACHE_DIR, "messages.db"),
+    "SLACK_SIGNING_SECRET": "smoke-signing-secret",
+    "SLACK_RATE_LIMIT_SCALE": "100",
+})
+SLACK_SERVER = FakeSlackServer(rate_limit_scale=100).start()
+os.environ["SLACK_API_URL"] = SLACK_SERVER.url
+
+import event_ingest  # noqa: E402
+from message_store import get_message_store  # noqa: E402
+from membership import preflight  # noqa: E402
+from row_index import RowIndex  # noqa: E402
+from sheets_writer import SheetsWriter  # noqa: E402
+import google_sheets_real  # noqa: E402
+import thread_expander  # noqa: E402
+import push_general_to_project_summary  # noqa: E402
+from google_sheets_real import GoogleSheetsClient  # noqa: E402
+
+
+def report(name, got, expected):
+    ok = got == expected
+    print(f"{'✅' if ok else '❌'} {name}: {got!r}" + ("" if ok else f" (expected {expected!r})"))
+    return ok
+
+
+def check_event_replies():
+    """Reply events skip the sheet but land in the message store; returns (name, got, expected) checks"""
+    batched = []
+
+    class Batcher:
+        def add(self, channel_id, message):
+            batched.append((channel_id, message["ts"]))
+
+    receiver = event_ingest.EventReceiver(Batcher(), host="127.0.0.1", port=0).start()
+    source = FakeEventSource(f"http://127.0.0.1:{receiver.port}/slack/events", os.environ["SLACK_SIGNING_SECRET"])
+    try:
+        parent = source.message("C0SMOKE01", "parent", ts="1700000000.000100")
+        source.message("C0SMOKE01", "reply", ts="1700000005.000200", thread_ts=parent)
+    finally:
+        receiver.stop()
+    replies = [msg["ts"] for msg in get_message_store().get_thread("C0SMOKE01", parent)]
+    return [
+        ("only the parent is batched for the sheet", batched, [("C0SMOKE01", parent)]),
+        ("reply event stored in its thread", replies, ["1700000005.000200"]),
+    ]
+
+
+def check_private_join():
+    """auto_join joins public channels only; a private channel is reported as needing an invite"""
+    workspace = make_workspace(3, messages_per_channel=1)
+    public, other = workspace["channels"][0], workspace["channels"][1]
+    public["is_member"] = False
+    workspace["channels"].append({"id": "G0PRIVATE", "name": "secret", "is_member": False,
+                                  "is_archived": False, "is_private": True})
+    SLACK_SERVER.load(workspace)
+    readable, unreadable = preflight(os.environ["SLACK_BOT_TOKEN"], [public["id"], other["id"], "G0PRIVATE"],
+                                     auto_join=True)
+    return [
+        ("public channel joined", public["id"] in readable, True),
+        ("private channel left for an invite", unreadable, ["G0PRIVATE"]),
+        ("conversations.join calls", SLACK_SERVER.calls["conversations.join"], 1),
+    ]
+
+
+def check_writer_interval():
+    """A single put reaches the sheet about flush_interval later, without waiting for close()"""
+    sheet = FakeSheetsService({"project summary": []})
+    client = GoogleSheetsClient(service=sheet)
+    row_index = RowIndex("smoke-sheet", "project summary", 3)
+    writer = SheetsWriter(client, "smoke-sheet", row_index, flush_interval=0.2).start()
+    try:
+        writer.put("C0SMOKE01:1700000000.000100", ["2023-11-14 22:13:20", "hello", "C0SMOKE01:1700000000.000100"])
+        deadline = time.monotonic() + 1.0
+        while not sheet.tabs["project summary"] and time.monotonic() < deadline:
+            time.sleep(0.02)
+        written = len(sheet.tabs["project summary"])
+    finally:
+        writer.close()
+    return [("row written before close()", written, 1)]
+
+
+def check_reply_concurrency():
+    """Thread expansion on every fetch worker still keeps conversations.replies within THREAD_WORKERS"""
+    workspace = make_workspace(40, messages_per_channel=5, thread_ratio=1.0)
+    for channel in workspace["channels"]:
+        channel["is_member"] = True
+    SLACK_SERVER.load(workspace)
+    google_sheets_real.set_sheets_client(GoogleSheetsClient(service=FakeSheetsService({"project summary": []})))
+    in_flight, peak, lock = 0, 0, threading.Lock()
+    fetch_replies = thread_expander.fetch_replies
+
+    def counted(*args):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        try:
+            return fetch_replies(*args)
+        finally:
+            with lock:
+                in_flight -= 1
+
+    thread_expander.fetch_replies = counted
+    try:
+        channels = [(channel["id"], channel["name"]) for channel in workspace["channels"]]
+        ok = push_general_to_project_summary.push_channels_summary_to_sheet(channels, max_workers=8)
+    finally:
+        thread_expander.fetch_replies = fetch_replies
+    return [
+        ("pipeline succeeded", ok, True),
+        ("threads expanded", SLACK_SERVER.calls["conversations.replies"] > 0, True),
+        ("peak conversations.replies in flight within THREAD_WORKERS", peak <= thread_expander.THREAD_WORKERS, True),
+    ]
+
+
+CHECKS = {
+    "event-replies": check_event_replies,
+    "private-join": check_private_join,
+    "writer-interval": check_writer_interval,
+    "reply-concurrency": check_reply_concurrency,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline checks of the pipelines against the fake Slack and Sheets services")
+    parser.add_argument("checks", nargs="*", help="Checks to run (default: all)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Show the pipelines' own output")
+    args = parser.parse_args()
+    results = []
+    try:
+        for name in args.checks or CHECKS:
+            print(f"--- {name}")
+            if args.verbose:
+                checks = CHECKS[name]()
+            else:
+                with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+                    checks = CHECKS[name]()
+            results += [report(*result) for result in checks]
+    finally:
+        SLACK_SERVER.stop()
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+    failed = results.count(False)
+    print(f"\n{'All checks passed' if not failed else f'{failed} checks failed'}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+import os
+import sys
+import argparse
+from datetime import datetime
+
+from quick_recap_extraction import extract_from_html, parse_recap_text, message_text, recap_day
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def check(name, got, expected):
+    ok = got == expected
+    print(f"{'✅' if ok else '❌'} {name}: {got!r}" + ("" if ok else f" (expected {expected!r})"))
+    return ok
+
+
+def run_checks(fixture):
+    """Parse the saved recap page and a few recap messages; returns the number of failed checks"""
+    with open(fixture, encoding="utf-8") as f:
+        html = f.read()
+    recap = extract_from_html(html, datetime(2025, 3, 1, 9, 0))
+    results = [check("saved page found a recap", recap is not None, True)]
+    if recap:
+        results += [
+            check("active channels", recap["active_channels"], 7),
+            check("total channels", recap["total_channels"], 12),
+            check("activity rate", recap["activity_rate"], 58.3),
+            check("recap date", recap["recap_date"], "Thursday, February 29"),
+            check("leap day resolves to the latest leap year", recap["recap_day"], "2024-02-29"),
+            check("delivered with love", recap["delivered_with_love"], True),
+        ]
+
+    # Recap content posted through the Web API lives in blocks, not in `text`
+    msg = {"ts": "1749546000.000100", "text": "Your daily recap", "blocks": [
+        {"type": "section", "text": {"type": "mrkdwn", "text": "8 of 10 channels active on Tuesday, June 10"}}]}
+    from_blocks = parse_recap_text(message_text(msg), datetime(2025, 6, 11))
+    results += [
+        check("recap read from message blocks", (from_blocks or {}).get("active_channels"), 8),
+        check("recap day from message blocks", (from_blocks or {}).get("recap_day"), "2025-06-10"),
+        check("date later in the year belongs to last year", recap_day("Wednesday, December 31", datetime(2025, 1, 2)),
+              "2024-12-31"),
+        check("text without a recap", parse_recap_text("standup notes, 3 of the tasks done"), None),
+    ]
+    return results.count(False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check recap extraction against a saved Slack page")
+    parser.add_argument("--fixture", default=os.path.join(FIXTURE_DIR, 'slack_recap.html'), help="Saved recap page")
+    args = parser.parse_args()
+    failed = run_checks(args.fixture)
+    print(f"\n{'All checks passed' if not failed else f'{failed} checks failed'}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
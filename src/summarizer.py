@@ -0,0 +1,306 @@
+import os
+import re
+import sys
+import math
+import argparse
+from itertools import repeat
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+
+import message_store
+from message_store import get_message_store
+from mrkdwn import MrkdwnRenderer, TOKEN_PATTERN
+
+# Load .env from project root
+env_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.env'))
+load_dotenv(env_path)
+
+SLACK_BOT_TOKEN = os.getenv("SLACK_BOT_TOKEN")
+SHEET_ID = os.getenv("GOOGLE_SHEET_ID")
+TAB_NAME = "daily summary"
+# Date, channel, messages, substantial messages, participants, keywords, key messages, summary key
+ROW_WIDTH = 8
+TOP_MESSAGES = 5
+TOP_KEYWORDS = 8
+TOP_PARTICIPANTS = 5
+WRITE_BATCH = 50  # summary rows per Sheets flush when streaming from worker processes
+MIN_WORDS = 3  # fewer content words than this is chatter ("thanks!", "+1", "on it")
+
+# Housekeeping posts that never belong in a summary
+NOISE_SUBTYPES = {
+    "channel_join", "channel_leave", "channel_topic", "channel_purpose", "channel_name",
+    "channel_archive", "channel_unarchive", "group_join", "group_leave", "pinned_item",
+    "unpinned_item", "bot_add", "bot_remove", "reminder_add", "bot_message",
+}
+WORD_PATTERN = re.compile(r"[a-z][a-z0-9_'-]+")
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being
+below between both but by can could did do does doing down during each few for from further get got
+had has have having he her here hers herself him himself his how i if in into is it its itself just
+let me more most my myself no nor not now of off on once only or other our ours ourselves out over own
+same she should so some such than that the their theirs them themselves then there these they this
+those through to too under until up very was we were what when where which while who whom why will
+with would you your yours yourself yourselves ok okay yes yeah thanks thank thx pls please hi hey
+hello lol im ive dont cant wont its thats going gonna want need like know think see look make sure
+today tomorrow yesterday https http www com
+""".split())
+
+
+def tokenize(text):
+    """Lowercase content words, stopwords removed"""
+    return [w for w in WORD_PATTERN.findall(text.lower()) if w not in STOPWORDS]
+
+
+def is_noise(msg, words):
+    """Joins, bots, emoji-only posts and one-word chatter are left out of the summary"""
+    if msg.get("subtype") in NOISE_SUBTYPES or msg.get("bot_id"):
+        return True
+    return len(words) < MIN_WORDS
+
+
+def prepare(messages):
+    """Tokenize a channel's messages once: [(msg, words)] for the substantial ones, plus per-user counts.
+
+    Emoji shortcodes, mentions and links are stripped before tokenizing, so emoji-only posts
+    come out empty and names do not crowd out topics.
+    """
+    prepared = []
+    participants = Counter()
+    for msg in messages:
+        words = tokenize(TOKEN_PATTERN.sub(" ", msg.get("text", "")))
+        if is_noise(msg, words):
+            continue
+        participants[msg.get("user", "bot/system")] += 1
+        prepared.append((msg, words))
+    return prepared, participants
+
+
+def document_frequencies(prepared):
+    """Number of messages each word appears in"""
+    df = Counter()
+    for _, words in prepared:
+        df.update(set(words))
+    return df
+
+
+def summarize_channel(channel_id, prepared, participants, total, df, num_docs, renderer,
+                      top_messages=TOP_MESSAGES, top_keywords=TOP_KEYWORDS, top_participants=TOP_PARTICIPANTS):
+    """Extractive summary of one channel-day: top TF-IDF messages, keywords and participants.
+
+    A message scores the sum of its distinct words' TF-IDF weights, normalised by length so
+    long posts do not win on size alone; threads with replies get a small boost. Only the
+    winning messages are rendered.
+    """
+    user_map = renderer.users
+    idf = {}
+    keyword_weights = Counter()
+    scored = []
+    for msg, words in prepared:
+        counts = Counter(words)
+        score = 0.0
+        for word, tf in counts.items():
+            weight = idf.get(word)
+            if weight is None:
+                weight = idf[word] = math.log((1 + num_docs) / (1 + df[word])) + 1
+            keyword_weights[word] += tf * weight
+            score += weight
+        score = score / math.sqrt(len(words)) * (1 + math.log1p(msg.get("reply_count", 0)))
+        scored.append((score, float(msg.get("ts", 0)), msg))
+    top = sorted(scored, key=lambda item: item[0], reverse=True)[:top_messages]
+    top.sort(key=lambda item: item[1])  # back in posting order
+    return {
+        "channel_id": channel_id,
+        "messages": total,
+        "substantial": len(prepared),
+        "participants": [(user_map.get(uid, uid), count) for uid, count in participants.most_common(top_participants)],
+        "keywords": [word for word, _ in keyword_weights.most_common(top_keywords)],
+        "key_messages": [
+            f"{user_map.get(msg.get('user'), msg.get('user', 'bot/system'))}: "
+            f"{' '.join(renderer.render(msg.get('text', '')).split())}"
+            for _, _, msg in top
+        ],
+    }
+
+
+def summarize_day(messages_by_channel, user_map=None, channel_names=None, top_messages=TOP_MESSAGES):
+    """One summary per channel for a day's {channel_id: messages}; IDF is computed over the whole day"""
+    renderer = MrkdwnRenderer(users=user_map, channels=channel_names)
+    prepared = {channel_id: prepare(messages) for channel_id, messages in messages_by_channel.items()}
+    df = Counter()
+    for channel_prepared, _ in prepared.values():
+        df.update(document_frequencies(channel_prepared))
+    num_docs = sum(len(channel_prepared) for channel_prepared, _ in prepared.values())
+    return [
+        summarize_channel(channel_id, prepared[channel_id][0], prepared[channel_id][1],
+                          len(messages_by_channel[channel_id]), df, num_docs, renderer, top_messages)
+        for channel_id in messages_by_channel
+    ]
+
+
+# --- Process pool mode: each worker reads its channels straight from the message store ---
+
+_worker = {}
+
+
+def _init_worker(user_map, channel_names, top_messages):
+    # The parent's SQLite connection must not be used across fork; open one per worker
+    message_store._store = None
+    _worker["renderer"] = MrkdwnRenderer(users=user_map, channels=channel_names)
+    _worker["top_messages"] = top_messages
+
+
+def _channel_frequencies(day, channel_id):
+    messages = load_channel_day(day, channel_id)
+    prepared, _ = prepare(messages)
+    return channel_id, len(messages), len(prepared), document_frequencies(prepared)
+
+
+def _summarize_stored_channel(day, channel_id, df, num_docs):
+    messages = load_channel_day(day, channel_id)
+    prepared, participants = prepare(messages)
+    return summarize_channel(channel_id, prepared, participants, len(messages), df, num_docs,
+                             _worker["renderer"], _worker["top_messages"])
+
+
+def summarize_day_parallel(day, channel_ids, user_map=None, channel_names=None, top_messages=TOP_MESSAGES,
+                           workers=None):
+    """Like summarize_day, sharded across `workers` processes; yields summaries in completion order.
+
+    Workers first return per-channel document frequencies, which are merged into the day's
+    IDF; each channel is then summarized with only the slice of it that its words need.
+    """
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(user_map or {}, channel_names or {}, top_messages)) as pool:
+        df = Counter()
+        vocabularies = {}
+        num_docs = 0
+        for channel_id, total, substantial, channel_df in pool.map(
+                _channel_frequencies, repeat(day), channel_ids):
+            if total:
+                df.update(channel_df)
+                vocabularies[channel_id] = channel_df.keys()
+                num_docs += substantial
+        futures = [
+            pool.submit(_summarize_stored_channel, day, channel_id,
+                        {word: df[word] for word in vocabulary}, num_docs)
+            for channel_id, vocabulary in vocabularies.items()
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def summary_row(day, summary, channel_names=None):
+    channel_id = summary["channel_id"]
+    return [
+        day,
+        f"#{(channel_names or {}).get(channel_id, channel_id)}",
+        summary["messages"],
+        summary["substantial"],
+        ", ".join(f"{name} ({count})" for name, count in summary["participants"]),
+        ", ".join(summary["keywords"]),
+        "\n".join(f"• {line}" for line in summary["key_messages"]),
+        f"{day}:{channel_id}",
+    ]
+
+
+def day_bounds(day):
+    start = datetime.strptime(day, "%Y-%m-%d")
+    return start.timestamp(), (start + timedelta(days=1)).timestamp()
+
+
+def load_channel_day(day, channel_id, store=None):
+    """Messages posted in one channel on `day` (YYYY-MM-DD, local time), thread replies included"""
+    since, until = day_bounds(day)
+    return (store or get_message_store()).get_messages(channel_id, since=since, until=until, newest_first=False)
+
+
+def load_day(day, channel_ids=None, store=None):
+    """{channel_id: messages} for every channel with messages on `day`"""
+    store = store or get_message_store()
+    messages_by_channel = {}
+    for channel_id in channel_ids or store.channel_ids():
+        messages = load_channel_day(day, channel_id, store)
+        if messages:
+            messages_by_channel[channel_id] = messages
+    return messages_by_channel
+
+
+def summarize(day, channel_ids=None, user_map=None, channel_names=None, top_messages=TOP_MESSAGES, workers=1):
+    """Summaries for `day` from the message store: in-process when workers == 1, else sharded
+    across `workers` processes (0 = one per CPU core)"""
+    if workers == 1:
+        return summarize_day(load_day(day, channel_ids), user_map, channel_names, top_messages)
+    return summarize_day_parallel(day, channel_ids or get_message_store().channel_ids(), user_map, channel_names,
+                                  top_messages, workers=workers or os.cpu_count())
+
+
+def write_summaries(day, summaries, channel_names=None, batch_size=WRITE_BATCH, tab_name=TAB_NAME):
+    """Upsert one row per channel into the daily summary tab, keyed on date + channel ID.
+
+    `summaries` may be a generator (e.g. summarize_day_parallel): rows are written in batches
+    of `batch_size` as they arrive rather than after the last channel finishes. The tab is
+    added on first use.
+    """
+    from google_sheets_real import get_sheets_client
+    from row_index import RowIndex
+    from rollups import ensure_tab
+    client = get_sheets_client()
+    try:
+        ensure_tab(client, SHEET_ID, tab_name)
+    except Exception as e:
+        print(f"❌ Could not open '{tab_name}' tab: {e}")
+        return False
+    row_index = RowIndex(SHEET_ID, tab_name, ROW_WIDTH)
+    rows, updated, ok = [], 0, True
+
+    def write_batch():
+        nonlocal updated, ok
+        updated += row_index.upsert(client, rows)
+        ok = client.flush() and ok
+        row_index.record_appends(client)
+        rows.clear()
+
+    for summary in summaries:
+        rows.append(summary_row(day, summary, channel_names))
+        if len(rows) >= batch_size:
+            write_batch()
+    if rows:
+        write_batch()
+    if ok:
+        print(f"✅ Wrote {updated} channel summaries for {day} to '{tab_name}' tab.")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize a day of stored Slack messages per channel")
+    parser.add_argument("--date", default=(datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d"),
+                        help="Day to summarize (YYYY-MM-DD, default yesterday)")
+    parser.add_argument("--channels", nargs="*", help="Channel IDs (default: every channel in the message store)")
+    parser.add_argument("--top", type=int, default=TOP_MESSAGES, help="Key messages per channel")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processes to shard channels across (0 = one per CPU core, 1 = run in-process)")
+    parser.add_argument("--dry-run", action="store_true", help="Print the summaries instead of writing them")
+    args = parser.parse_args()
+
+    user_map, channel_names = {}, {}
+    if SLACK_BOT_TOKEN:
+        from user_directory import get_user_directory
+        from channel_index import get_channel_index
+        user_map = get_user_directory(SLACK_BOT_TOKEN).user_map()
+        channel_names = get_channel_index(SLACK_BOT_TOKEN).names_by_id()
+    summaries = summarize(args.date, args.channels, user_map, channel_names, args.top, args.workers)
+    if args.dry_run:
+        count = 0
+        for summary in summaries:
+            print("\n".join(str(cell) for cell in summary_row(args.date, summary, channel_names)[1:7]) + "\n")
+            count += 1
+        if not count:
+            print(f"No stored messages for {args.date}. Run backfill.py or a push first.")
+        return 0 if count else 1
+    return 0 if write_summaries(args.date, summaries, channel_names) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,36 @@
+from local_cache import cache_path, load_json, save_json
+
+# Per-tab, per-channel high-water marks live next to the other local caches
+SYNC_STATE_FILE = cache_path('sync_state.json')
+# Cursors saved before jobs could choose a tab are bare channel IDs and belong to this tab
+LEGACY_TAB = "project summary"
+
+
+class SyncState:
+    """Last-seen Slack `ts` per channel for one tab, so each run only asks for messages newer than it.
+
+    Cursors are kept per (tab, channel): two incremental jobs writing the same channel to
+    different tabs each advance their own, so neither starves the other.
+    """
+
+    def __init__(self, tab=LEGACY_TAB, path=SYNC_STATE_FILE):
+        self.tab = tab
+        self.path = path
+        self.cursors = {}
+        for key, ts in load_json(self.path, {}).items():
+            self.cursors[key if "|" in key else self._key(key, LEGACY_TAB)] = ts
+
+    def _key(self, channel_id, tab=None):
+        return f"{tab or self.tab}|{channel_id}"
+
+    def get_cursor(self, channel_id):
+        return self.cursors.get(self._key(channel_id))
+
+    def advance(self, channel_id, ts):
+        """Move the channel's high-water mark forward; older timestamps are ignored"""
+        current = self.get_cursor(channel_id)
+        if current is None or float(ts) > float(current):
+            self.cursors[self._key(channel_id)] = ts
+
+    def save(self):
+        save_json(self.path, self.cursors, indent=2)
@@ -0,0 +1,147 @@
+import os
+import re
+import sys
+import argparse
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+
+from google_sheets_real import get_sheets_client
+from row_index import RowIndex
+import push_general_to_project_summary as project_summary
+
+# Load .env from project root
+env_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.env'))
+load_dotenv(env_path)
+
+SHEET_ID = os.getenv("GOOGLE_SHEET_ID")
+# Keyed rows whose message is older than this many days leave the live tab
+ROLLOVER_DAYS = int(os.getenv("SUMMARY_ROLLOVER_DAYS", 30))
+# Only rows carrying a message key (<channel ID>:<Slack ts>) are moved; headers, the meeting
+# cadence block and other hand-placed rows stay where they are
+KEY_PATTERN = re.compile(r"^[A-Z][A-Z0-9]+:(\d+\.\d+)$")
+
+
+def archive_tab_name(tab_name, ts):
+    """Monthly archive tab for a message, e.g. 'project summary 2025-01'"""
+    return f"{tab_name} {datetime.fromtimestamp(ts):%Y-%m}"
+
+
+def row_runs(row_numbers):
+    """Sorted 1-based row numbers -> [(start, end)] runs of consecutive rows, last run first"""
+    runs = []
+    for row_num in sorted(row_numbers):
+        if runs and runs[-1][1] == row_num - 1:
+            runs[-1][1] = row_num
+        else:
+            runs.append([row_num, row_num])
+    return [tuple(run) for run in reversed(runs)]
+
+
+def rollover(tab_name=project_summary.TAB_NAME, days=ROLLOVER_DAYS, width=project_summary.ROW_WIDTH,
+             sheet_id=None, dry_run=False):
+    """Move keyed rows older than `days` from `tab_name` into monthly archive tabs.
+
+    Archive tabs are added as needed in one batchUpdate. Rows are upserted into them through
+    their own row index, so a rerun after a failure never duplicates archived rows. The moved
+    rows are then deleted from the live tab in one batchUpdate and the live row index is
+    renumbered from what was read, so the next push neither re-reads nor re-verifies the tab.
+    Returns the number of rows moved, or None on failure.
+    """
+    sheet_id = sheet_id or SHEET_ID
+    client = get_sheets_client()
+    if not client.test_connection(sheet_id):
+        return None
+    live = RowIndex(sheet_id, tab_name, width, legacy_key=project_summary.legacy_row_key)
+    values = client.service.spreadsheets().values().get(
+        spreadsheetId=sheet_id,
+        range=live.range_name
+    ).execute().get('values', [])
+
+    cutoff = (datetime.now() - timedelta(days=days)).timestamp()
+    moving = {}  # archive tab -> rows
+    moved_rows = []
+    for row_num, row in enumerate(values, start=1):
+        match = KEY_PATTERN.match(row[width - 1]) if len(row) >= width else None
+        if match and float(match.group(1)) < cutoff:
+            moving.setdefault(archive_tab_name(tab_name, float(match.group(1))), []).append(row)
+            moved_rows.append(row_num)
+    if not moved_rows:
+        print(f"Nothing older than {days} days in '{tab_name}' ({len(values)} rows).")
+        return 0
+    print(f"Moving {len(moved_rows)} of {len(values)} rows from '{tab_name}' into {len(moving)} archive tabs")
+    if dry_run:
+        for archive, rows in sorted(moving.items()):
+            print(f"  {archive}: {len(rows)} rows")
+        return len(moved_rows)
+
+    if sheet_id not in client.metadata:
+        client.metadata[sheet_id] = client.service.spreadsheets().get(spreadsheetId=sheet_id).execute()
+    sheets = client.metadata[sheet_id].get("sheets", [])
+    tab_ids = {sheet["properties"]["title"]: sheet["properties"]["sheetId"] for sheet in sheets}
+    new_tabs = sorted(archive for archive in moving if archive not in tab_ids)
+    try:
+        if new_tabs:
+            client.service.spreadsheets().batchUpdate(
+                spreadsheetId=sheet_id,
+                body={"requests": [{"addSheet": {"properties": {"title": archive}}} for archive in new_tabs]}
+            ).execute()
+            print(f"➕ Added archive tabs: {', '.join(new_tabs)}")
+    except Exception as e:
+        print(f"❌ Could not add archive tabs: {e}")
+        return None
+
+    # 1. Copy into the archives (keyed upserts, so safe to repeat)
+    archives = {archive: RowIndex(sheet_id, archive, width) for archive in moving}
+    for archive, rows in moving.items():
+        archives[archive].upsert(client, rows)
+    ok = client.flush()
+    for archive_index in archives.values():
+        archive_index.record_appends(client)
+    if not ok:
+        print("❌ Archive writes failed; the live tab was left untouched.")
+        return None
+
+    # 2. Delete from the live tab, bottom run first so earlier row numbers stay valid
+    try:
+        client.service.spreadsheets().batchUpdate(
+            spreadsheetId=sheet_id,
+            body={"requests": [
+                {"deleteDimension": {"range": {"sheetId": tab_ids[tab_name], "dimension": "ROWS",
+                                               "startIndex": start - 1, "endIndex": end}}}
+                for start, end in row_runs(moved_rows)
+            ]}
+        ).execute()
+    except Exception as e:
+        print(f"❌ Could not delete archived rows from '{tab_name}': {e}")
+        live.invalidate()
+        return None
+
+    # 3. Renumber the live index: every kept row moves up by the deleted rows above it
+    moved = set(moved_rows)
+    live.rows = {}
+    for row_num, row in enumerate(values, start=1):
+        key = row[width - 1] if len(row) >= width else None
+        if key and row_num not in moved:
+            live.rows[key] = row_num - bisect_left(moved_rows, row_num)
+    live.save()
+
+    # Grid sizes changed: refresh the metadata so header anchors are re-resolved
+    client.metadata[sheet_id] = client.service.spreadsheets().get(spreadsheetId=sheet_id).execute()
+    from sheet_anchors import get_anchor_resolver
+    get_anchor_resolver(client, sheet_id).invalidate()
+    print(f"✅ Archived {len(moved_rows)} rows; '{tab_name}' now has {len(values) - len(moved_rows)} rows.")
+    return len(moved_rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move old rows from the live summary tab into monthly archive tabs")
+    parser.add_argument("--tab", default=project_summary.TAB_NAME, help="Live tab to roll over")
+    parser.add_argument("--days", type=int, default=ROLLOVER_DAYS, help="Keep this many days of messages live")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be moved")
+    args = parser.parse_args()
+    return 0 if rollover(args.tab, args.days, dry_run=args.dry_run) is not None else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+from concurrent.futures import ThreadPoolExecutor
+from slack_api import paginate, SlackApiError
+from message_store import get_message_store
+
+# conversations.replies is tier 3 like history, so this stays well inside the shared budget
+THREAD_WORKERS = 4
+
+# One reply pool for the whole process: expand_threads runs on every channel fetch worker,
+# and per-call pools would multiply the requests in flight by the number of those workers
+_reply_pool = ThreadPoolExecutor(max_workers=THREAD_WORKERS, thread_name_prefix="thread-replies")
+
+
+def is_thread_parent(msg):
+    return bool(msg.get("reply_count")) and msg.get("thread_ts", msg.get("ts")) == msg.get("ts")
+
+
+def fetch_replies(token, channel_id, thread_ts):
+    """Every reply in one thread, oldest first (parent excluded), or None if Slack reports an error"""
+    try:
+        thread = list(paginate(token, "conversations.replies", "messages", {"channel": channel_id, "ts": thread_ts}))
+    except SlackApiError as e:
+        print(f"Error fetching replies for {channel_id}/{thread_ts}: {e.data}")
+        return None
+    return [reply for reply in thread if reply.get("ts") != thread_ts]
+
+
+def expand_threads(token, messages_by_channel, store=None):
+    """Attach each thread parent's replies as msg["replies"] (oldest first), in place.
+
+    A thread whose `latest_reply` is already in the message store has not changed since
+    it was last fetched, so its replies are read from the store instead of Slack. Only
+    changed threads are fetched, through a reply pool shared by every caller in the process,
+    so at most THREAD_WORKERS requests are in flight however many channels expand at once.
+    Returns (threads fetched, threads served from the store).
+    """
+    store = store or get_message_store()
+    stale = []
+    skipped = 0
+    for channel_id, messages in messages_by_channel.items():
+        for msg in messages:
+            if not is_thread_parent(msg):
+                continue
+            stored = store.get_thread(channel_id, msg["ts"])
+            if stored and stored[-1]["ts"] == msg.get("latest_reply"):
+                msg["replies"] = stored
+                skipped += 1
+            else:
+                stale.append((channel_id, msg))
+    results = _reply_pool.map(lambda item: fetch_replies(token, item[0], item[1]["ts"]), stale)
+    for (channel_id, msg), replies in zip(stale, results):
+        if replies is None:
+            msg["replies"] = store.get_thread(channel_id, msg["ts"])
+            continue
+        store.add_messages(channel_id, replies)
+        msg["replies"] = replies
+    return len(stale), skipped
@@ -0,0 +1,107 @@
+import time
+from slack_api import api_get, paginate, SlackApiError
+from local_cache import cache_path, load_json, save_json, Shared
+
+USER_CACHE_FILE = cache_path('users.json')
+USER_CACHE_TTL = 24 * 60 * 60  # seconds before users.list is swept again
+USER_RETRY_AFTER = 5 * 60       # seconds before a failed sweep is tried again
+
+_directories = Shared()
+
+
+def display_name_for(user):
+    """Pick the name Slack shows for a user object: display name, real name, handle, then ID"""
+    profile = user.get("profile", {})
+    return profile.get("display_name") or profile.get("real_name") or user.get("name") or user.get("id")
+
+
+class UserDirectory:
+    """Workspace user ID -> display name map, persisted to disk and refreshed on TTL expiry.
+
+    IDs users.info cannot resolve (bots, deleted users) are remembered for the TTL, and a
+    failed sweep is only retried after USER_RETRY_AFTER, so neither costs a call per message.
+    """
+
+    def __init__(self, token, cache_file=USER_CACHE_FILE, ttl=USER_CACHE_TTL):
+        self.token = token
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.fetched_at = 0
+        # user_id -> {"name": display name, "updated": Slack profile update stamp}
+        self.users = {}
+        self.misses = {}  # user_id -> time before which users.info is not asked again
+        self.failed_at = 0
+        self._load()
+
+    def _load(self):
+        cached = load_json(self.cache_file, {})
+        self.fetched_at = cached.get("fetched_at", 0)
+        self.users = cached.get("users", {})
+        self.misses = cached.get("misses", {})
+
+    def _save(self):
+        save_json(self.cache_file, {"fetched_at": self.fetched_at, "users": self.users, "misses": self.misses})
+
+    def is_stale(self):
+        if self.failed_at:
+            return time.time() - self.failed_at > USER_RETRY_AFTER
+        return time.time() - self.fetched_at > self.ttl
+
+    def refresh(self):
+        """Sweep users.list page by page and rewrite only profiles whose `updated` stamp changed"""
+        changed = 0
+        try:
+            for user in paginate(self.token, "users.list", "members"):
+                uid = user.get("id")
+                cached = self.users.get(uid)
+                if cached is None or cached.get("updated") != user.get("updated"):
+                    self.users[uid] = {"name": display_name_for(user), "updated": user.get("updated")}
+                    changed += 1
+        except SlackApiError as e:
+            self.failed_at = time.time()
+            print(f"Error listing users: {e.data}")
+            return False
+        self.fetched_at = time.time()
+        self.failed_at = 0
+        self.misses = {uid: until for uid, until in self.misses.items() if uid not in self.users}
+        self._save()
+        print(f"🔄 User directory refreshed: {changed} of {len(self.users)} profiles changed")
+        return True
+
+    def ensure_fresh(self):
+        if self.is_stale():
+            self.refresh()
+
+    def lookup(self, user_id):
+        """Fetch a single user with users.info; used only for IDs missing from the cache"""
+        if time.time() < self.misses.get(user_id, 0):
+            return None
+        data = api_get(self.token, "users.info", {"user": user_id})
+        if data.get("ok") and "user" in data:
+            user = data["user"]
+            self.users[user_id] = {"name": display_name_for(user), "updated": user.get("updated")}
+            self.misses.pop(user_id, None)
+            self._save()
+            return self.users[user_id]["name"]
+        # Unknown IDs stay unknown for the TTL; transient failures are retried sooner
+        transient = data.get("error") in ("ratelimited", "internal_error") or str(data.get("error")).startswith("request_failed")
+        self.misses[user_id] = time.time() + (USER_RETRY_AFTER if transient else self.ttl)
+        self._save()
+        return None
+
+    def get_display_name(self, user_id):
+        self.ensure_fresh()
+        cached = self.users.get(user_id)
+        if cached:
+            return cached["name"]
+        return self.lookup(user_id) or user_id
+
+    def user_map(self):
+        """Plain user ID -> display name dict for bulk mention resolution"""
+        self.ensure_fresh()
+        return {uid: entry["name"] for uid, entry in self.users.items()}
+
+
+def get_user_directory(token):
+    """The process-wide UserDirectory for `token`"""
+    return _directories.get(token, lambda: UserDirectory(token))